@@ -1,8 +1,9 @@
 import asyncio
 import logging
 import httpx
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, Tuple
 from app.core.config import settings
+from app.core import json_utils
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +19,7 @@ class PerplexityClient:
         if not self.api_keys:
             logger.warning("No Perplexity API keys found in settings")
         else:
-            logger.info(f"Initialized with {len(self.api_keys)} Perplexity API keys")
+            logger.info("Initialized with %d Perplexity API keys", len(self.api_keys))
     
     def _get_current_key(self) -> str:
         """현재 사용할 API 키 반환"""
@@ -30,7 +31,7 @@ class PerplexityClient:
         """다음 API 키로 전환"""
         if len(self.api_keys) > 1:
             self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-            logger.info(f"Rotated to API key {self.current_key_index + 1}/{len(self.api_keys)}")
+            logger.info("Rotated to API key %d/%d", self.current_key_index + 1, len(self.api_keys))
     
     def _get_headers(self) -> Dict[str, str]:
         """현재 키로 헤더 생성"""
@@ -52,18 +53,22 @@ class PerplexityClient:
         max_retries = 2
         base_delay = 2.0
         
+        # 프롬프트는 claim에만 의존하므로 재시도 루프 밖에서 한 번만 생성
+        prompt = self._create_fact_check_prompt(claim)
+        
         # 모든 키를 시도
         for key_attempt in range(len(self.api_keys) if self.api_keys else 1):
             for retry_attempt in range(max_retries):
                 try:
                     # Perplexity에 팩트체킹 요청
-                    prompt = self._create_fact_check_prompt(claim)
                     response = await self._call_api(prompt)
                     
                     # 응답에서 점수 추출
                     score = self._parse_verification_score(response, claim)
                     
-                    logger.debug(f"Claim verification: '{claim[:50]}...' -> {score:.1f} (key {self.current_key_index + 1})")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Claim verification: '%s...' -> %.1f (key %d)",
+                                     claim[:50], score, self.current_key_index + 1)
                     return score
                     
                 except Exception as e:
@@ -73,63 +78,63 @@ class PerplexityClient:
                     if "429" in error_msg or "rate limit" in error_msg.lower():
                         if retry_attempt < max_retries - 1:
                             delay = base_delay * (2 ** retry_attempt)
-                            logger.warning(f"Rate limit hit for claim '{claim[:30]}...', retrying in {delay}s (key {self.current_key_index + 1}, attempt {retry_attempt + 1}/{max_retries})")
+                            logger.warning("Rate limit hit for claim '%s...', retrying in %ss (key %d, attempt %d/%d)",
+                                           claim[:30], delay, self.current_key_index + 1, retry_attempt + 1, max_retries)
                             await asyncio.sleep(delay)
                             continue
                         else:
                             # 재시도 횟수 초과, 다른 키로 전환
                             if key_attempt < len(self.api_keys) - 1:
-                                logger.warning(f"Key {self.current_key_index + 1} exhausted, switching to next key")
+                                logger.warning("Key %d exhausted, switching to next key", self.current_key_index + 1)
                                 self._rotate_key()
                                 break
                     
-                    logger.error(f"Perplexity verification failed for claim '{claim[:50]}...': {error_msg}")
+                    logger.error("Perplexity verification failed for claim '%s...': %s", claim[:50], error_msg)
                     if key_attempt == len(self.api_keys) - 1:  # 마지막 키인 경우
                         return 0.0
                     break
         
-        logger.error(f"All API keys exhausted for claim '{claim[:50]}...'")
+        logger.error("All API keys exhausted for claim '%s...'", claim[:50])
         return 0.0
     
-    async def verify_claims_batch(self, claims: list[str]) -> list[float]:
+    async def verify_claims_batch(
+        self,
+        claims: list[str],
+        on_result: Optional[Callable[[int, float], None]] = None
+    ) -> list[float]:
         """
         여러 claim을 배치로 검증 (Rate limit 고려)
         
         Args:
             claims: 검증할 주장들의 리스트
+            on_result: claim 하나의 검증이 끝날 때마다 (claim 인덱스, 점수)로 호출되는 콜백
             
         Returns:
-            list[float]: 각 claim의 점수 리스트
+            list[float]: 각 claim의 점수 리스트 (claims와 같은 순서)
         """
-        logger.info(f"Batch verifying {len(claims)} claims with Perplexity")
+        logger.info("Batch verifying %d claims with Perplexity", len(claims))
         
         # Rate limit을 고려한 배치 처리
         batch_size = 5  # 5개씩 배치 처리 (10->5로 감소)
         delay_between_batches = 3.0  # 배치 간 지연 (2->3초로 증가)
         
-        all_scores = []
+        all_scores = [0.0] * len(claims)
         
         for i in range(0, len(claims), batch_size):
             batch_claims = claims[i:i + batch_size]
-            logger.debug(f"Processing batch {i//batch_size + 1}/{(len(claims) + batch_size - 1)//batch_size}")
-            
-            # 배치 내 병렬 처리
-            batch_scores = []
-            batch_tasks = [self.verify_claim(claim) for claim in batch_claims]
+            logger.debug("Processing batch %d/%d", i // batch_size + 1, (len(claims) + batch_size - 1) // batch_size)
             
-            try:
-                batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-                for j, result in enumerate(batch_results):
-                    if isinstance(result, Exception):
-                        logger.error(f"Claim {i+j+1} verification failed: {str(result)}")
-                        batch_scores.append(0.0)
-                    else:
-                        batch_scores.append(result)
-            except Exception as e:
-                logger.error(f"Batch processing failed: {str(e)}")
-                batch_scores = [0.0] * len(batch_claims)
+            # 배치 내 병렬 처리 - 끝나는 순서대로 결과 반영
+            batch_tasks = [
+                asyncio.create_task(self._verify_claim_indexed(index, claim))
+                for index, claim in enumerate(batch_claims, start=i)
+            ]
             
-            all_scores.extend(batch_scores)
+            for next_done in asyncio.as_completed(batch_tasks):
+                index, score = await next_done
+                all_scores[index] = score
+                if on_result:
+                    on_result(index, score)
             
             # 다음 배치 전 지연 (마지막 배치가 아닌 경우)
             if i + batch_size < len(claims):
@@ -137,6 +142,14 @@ class PerplexityClient:
         
         return all_scores
     
+    async def _verify_claim_indexed(self, index: int, claim: str) -> Tuple[int, float]:
+        """claim 검증 결과를 인덱스와 함께 반환 (실패 시 0점)"""
+        try:
+            return index, await self.verify_claim(claim)
+        except Exception as e:
+            logger.error("Claim %d verification failed: %s", index + 1, e)
+            return index, 0.0
+    
     def _create_fact_check_prompt(self, claim: str) -> str:
         """팩트체킹용 프롬프트 생성 - 구조화된 JSON 응답 요청"""
         return f"""Analyze the following claim and extract factual elements to verify against evidence.
@@ -214,14 +227,13 @@ IMPORTANT: Respond with ONLY the JSON object, no additional text."""
     def _parse_verification_score(self, response: Dict[str, Any], claim: str) -> float:
         """API 응답에서 JSON 파싱 후 점수 계산"""
         try:
-            import json
             import re
             
             # 응답에서 텍스트 추출
             content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
             
             if not content:
-                logger.warning(f"Empty response from Perplexity for claim: {claim[:50]}...")
+                logger.warning("Empty response from Perplexity for claim: %s...", claim[:50])
                 return 0.0
             
             # JSON 추출 (```json ... ``` 또는 순수 JSON)
@@ -234,14 +246,14 @@ IMPORTANT: Respond with ONLY the JSON object, no additional text."""
                 if json_match:
                     json_str = json_match.group(0)
                 else:
-                    logger.warning(f"No JSON found in response for claim: {claim[:50]}...")
+                    logger.warning("No JSON found in response for claim: %s...", claim[:50])
                     return self._fallback_score(content)
             
             # JSON 파싱
             try:
-                data = json.loads(json_str)
-            except json.JSONDecodeError as e:
-                logger.warning(f"JSON parse error: {e}, falling back to text analysis")
+                data = json_utils.loads(json_str)
+            except ValueError as e:
+                logger.warning("JSON parse error: %s, falling back to text analysis", e)
                 return self._fallback_score(content)
             
             # 점수 계산
@@ -249,7 +261,7 @@ IMPORTANT: Respond with ONLY the JSON object, no additional text."""
             return score
             
         except Exception as e:
-            logger.error(f"Error parsing Perplexity response: {str(e)}")
+            logger.error("Error parsing Perplexity response: %s", e)
             return 0.0
     
     def _calculate_score_from_json(self, data: Dict[str, Any], claim: str) -> float:
@@ -302,14 +314,13 @@ IMPORTANT: Respond with ONLY the JSON object, no additional text."""
             # 0-100 범위로 제한
             final_score = max(0.0, min(100.0, final_score))
             
-            logger.debug(f"Score calculation: matched={matched}/{total_elements}, "
-                        f"contradicted={contradicted}, sources={source_count}, "
-                        f"final={final_score:.1f}")
+            logger.debug("Score calculation: matched=%d/%d, contradicted=%d, sources=%s, final=%.1f",
+                         matched, total_elements, contradicted, source_count, final_score)
             
             return final_score
             
         except Exception as e:
-            logger.error(f"Score calculation error: {str(e)}")
+            logger.error("Score calculation error: %s", e)
             return 50.0
     
     def _fallback_score(self, content: str) -> float:
@@ -342,5 +353,5 @@ IMPORTANT: Respond with ONLY the JSON object, no additional text."""
             score = await self.verify_claim(test_claim)
             return score > 0
         except Exception as e:
-            logger.error(f"Perplexity health check failed: {str(e)}")
+            logger.error("Perplexity health check failed: %s", e)
             return False
\ No newline at end of file
@@ -1,4 +1,5 @@
 import random
+import re
 import json
 from app.adapters.judge.base import BaseJudge
 
@@ -66,36 +67,49 @@ class MockJudge(BaseJudge):
             }, ensure_ascii=False)
         
         elif task_type == "compliance_evaluation":
-            # 준수 평가 가짜 응답 - 출력 내용에 따라 다르게 평가
-            if "OpenAI" in prompt and ("2023년 3월" in prompt or "GPT-4" in prompt):
-                # 정확한 정보가 포함된 경우
-                compliance_status = "지킴"
-                reason = "정확한 날짜와 사실 정보 포함"
-            elif "노벨 물리학상" in prompt and ("홉필드" in prompt or "힌턴" in prompt):
-                # 정확한 정보가 포함된 경우  
-                compliance_status = "지킴"
-                reason = "정확한 수상자 정보 포함"
-            elif "윤석열" in prompt and "2022년 5월" in prompt:
-                # 정확한 정보가 포함된 경우
-                compliance_status = "지킴" 
-                reason = "정확한 대통령 정보와 취임일 포함"
-            elif "죄송합니다" in prompt or "어렵습니다" in prompt or "구체적인" in prompt:
-                # 모호한 답변인 경우
-                compliance_status = "안지킴"
-                reason = "구체적인 답변을 제공하지 않음"
-            else:
-                # 기타 경우
-                compliance_status = random.choice(["지킴", "애매함"])
-                reason = "부분적으로 조건 충족"
-            
-            return json.dumps({
-                "explicit_conditions_compliance": [
-                    {"condition": "조건1", "status": compliance_status, "reason": reason},
-                    {"condition": "조건2", "status": compliance_status, "reason": reason}
-                ],
-                "direction_compliance": {"status": compliance_status, "reason": f"방향성 {compliance_status} - {reason}"},
-                "overall_assessment": f"전체적으로 {compliance_status} 상태입니다."
-            }, ensure_ascii=False)
+            return json.dumps(self._mock_compliance(prompt), ensure_ascii=False)
+        
+        elif task_type == "compliance_batch_evaluation":
+            # "### 출력 N" 구분자로 나뉜 출력별로 준수 평가 생성
+            sections = re.split(r'^### 출력 (\d+)$', prompt, flags=re.MULTILINE)
+            header = sections[0]
+            evaluations = []
+            for k in range(1, len(sections) - 1, 2):
+                evaluation = self._mock_compliance(header + sections[k + 1])
+                evaluations.append({"output_index": int(sections[k]), **evaluation})
+            return json.dumps(evaluations, ensure_ascii=False)
+    
+    def _mock_compliance(self, prompt: str) -> dict:
+        """준수 평가 가짜 응답 - 출력 내용에 따라 다르게 평가"""
+        if "OpenAI" in prompt and ("2023년 3월" in prompt or "GPT-4" in prompt):
+            # 정확한 정보가 포함된 경우
+            compliance_status = "지킴"
+            reason = "정확한 날짜와 사실 정보 포함"
+        elif "노벨 물리학상" in prompt and ("홉필드" in prompt or "힌턴" in prompt):
+            # 정확한 정보가 포함된 경우  
+            compliance_status = "지킴"
+            reason = "정확한 수상자 정보 포함"
+        elif "윤석열" in prompt and "2022년 5월" in prompt:
+            # 정확한 정보가 포함된 경우
+            compliance_status = "지킴" 
+            reason = "정확한 대통령 정보와 취임일 포함"
+        elif "죄송합니다" in prompt or "어렵습니다" in prompt or "구체적인" in prompt:
+            # 모호한 답변인 경우
+            compliance_status = "안지킴"
+            reason = "구체적인 답변을 제공하지 않음"
+        else:
+            # 기타 경우
+            compliance_status = random.choice(["지킴", "애매함"])
+            reason = "부분적으로 조건 충족"
+        
+        return {
+            "explicit_conditions_compliance": [
+                {"condition": "조건1", "status": compliance_status, "reason": reason},
+                {"condition": "조건2", "status": compliance_status, "reason": reason}
+            ],
+            "direction_compliance": {"status": compliance_status, "reason": f"방향성 {compliance_status} - {reason}"},
+            "overall_assessment": f"전체적으로 {compliance_status} 상태입니다."
+        }
         
     async def analyze_text(self, prompt: str) -> str:
         """가짜 텍스트 분석 메서드"""
@@ -15,9 +15,10 @@ class BedrockRunner(BaseRunner):
     
     def __init__(self):
         # boto3 설정 (연결 풀 크기 증가)
+        # 동시 호출 상한만큼 연결/스레드를 확보해 호출마다 연결을 새로 맺거나 대기하지 않도록 함
         from botocore.config import Config
         config = Config(
-            max_pool_connections=25,  # 연결 풀 크기 증가
+            max_pool_connections=settings.runner_max_concurrency,
             retries={'max_attempts': 3}
         )
         
@@ -29,7 +30,7 @@ class BedrockRunner(BaseRunner):
             config=config
         )
         # 스레드풀 생성 (병렬 처리용)
-        self.executor = ThreadPoolExecutor(max_workers=20)
+        self.executor = ThreadPoolExecutor(max_workers=settings.runner_max_concurrency)
     
     async def invoke(
         self, 
@@ -1,4 +1,5 @@
 import asyncio
+import binascii
 import logging
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
 from typing import Optional
@@ -8,6 +9,7 @@ from app.core.schemas import (
 )
 from app.orchestrator.context import ExecutionContext
 from app.orchestrator.pipeline import Orchestrator
+from app.storage.repo import encode_job_cursor, decode_job_cursor
 from app.core.errors import PromptEvalError, ErrorCategory
 from app.core.logging import get_structured_logger
 
@@ -142,22 +144,40 @@ async def get_processing_status():
 async def list_jobs(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
-    request_id: Optional[str] = Query(None, description="특정 request_id로 필터링")
+    request_id: Optional[str] = Query(None, description="특정 request_id로 필터링"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor (지원하는 저장소에서는 page 대신 사용)")
 ):
     """작업 목록 조회"""
     try:
         context = get_context()
         storage = context.get_storage()
-        jobs = await storage.list_jobs(page, size, request_id)
+        use_cursor = bool(cursor) and storage.supports_cursor and not request_id
+        if use_cursor:
+            # 잘못된 커서는 저장소 오류(500)가 아닌 요청 오류로 처리
+            try:
+                decode_job_cursor(cursor)
+            except (ValueError, binascii.Error, UnicodeDecodeError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            jobs = await storage.list_jobs(page, size, request_id, cursor=cursor)
+        else:
+            jobs = await storage.list_jobs(page, size, request_id)
         total = await storage.count_jobs(request_id)
         
+        # 페이지가 가득 찼으면 다음 페이지 커서 제공
+        next_cursor = None
+        if storage.supports_cursor and not request_id and len(jobs) == size:
+            next_cursor = encode_job_cursor(jobs[-1])
+        
         return JobListResponse(
             jobs=jobs,
             total=total,
-            page=page,
-            size=size
+            page=None if use_cursor else page,  # 커서 조회에서는 페이지 번호가 의미 없음
+            size=size,
+            next_cursor=next_cursor
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         structured_logger.error(
             f"Job listing failed: {str(e)}",
@@ -0,0 +1,34 @@
+import hashlib
+import logging
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """출력 텍스트 SHA-256 키 기반 인메모리 LRU 임베딩 캐시 (작업 간 재사용)"""
+
+    def __init__(self, max_entries: int = 1024, dtype: str = "float32"):
+        self.max_entries = max_entries
+        self.dtype = np.dtype(dtype)  # float16이면 메모리 절반 (유사도 오차 약 1e-3)
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        """캐시 키 생성"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """캐시된 임베딩 조회 (조회된 항목은 가장 최근으로 이동)"""
+        vector = self._entries.get(key)
+        if vector is not None:
+            self._entries.move_to_end(key)
+        return vector
+
+    def put(self, key: str, embedding: List[float]):
+        """임베딩 저장 (연속된 dtype 배열로 보관, 가득 차면 가장 오래 안 쓴 항목부터 제거)"""
+        self._entries[key] = np.asarray(embedding, dtype=self.dtype)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
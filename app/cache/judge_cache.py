@@ -0,0 +1,166 @@
+import sqlite3
+import asyncio
+import logging
+import hashlib
+from typing import Optional
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Judge 어댑터가 예외 대신 반환하는 실패 응답 (캐시하지 않음)
+_FAILURE_PREFIXES = ("평가 실패", "분석 실패")
+
+class JudgeCache:
+    """SQLite 기반 Judge 응답 영속 캐시 (모델 + 프롬프트 + 작업 종류의 SHA-256 키)"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or settings.judge_cache_path)
+        self.ttl = settings.judge_cache_ttl
+        self._init_db()
+
+    def _init_db(self):
+        """데이터베이스 초기화 (만료된 항목도 함께 정리)"""
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS judge_cache (
+                        prompt_hash TEXT PRIMARY KEY,
+                        task_type TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        expires_at TIMESTAMP NOT NULL
+                    )
+                """)
+
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_judge_cache_expires_at
+                    ON judge_cache(expires_at)
+                """)
+
+                self._delete_expired(conn)
+                conn.commit()
+                logger.info(f"Judge cache initialized: {self.db_path}")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize judge cache: {str(e)}")
+            raise
+
+    @staticmethod
+    def make_key(model_id: str, prompt: str, task_type: str) -> str:
+        """캐시 키 생성"""
+        return hashlib.sha256(f"{model_id}\x00{task_type}\x00{prompt}".encode('utf-8')).hexdigest()
+
+    async def get(self, prompt_hash: str) -> Optional[str]:
+        """캐시된 Judge 응답 조회"""
+        try:
+            # sqlite3 호출이 이벤트 루프를 막지 않도록 스레드에서 실행
+            return await asyncio.to_thread(self._get, prompt_hash)
+
+        except Exception as e:
+            logger.error(f"Failed to get judge response from cache: {str(e)}")
+            return None
+
+    def _get(self, prompt_hash: str) -> Optional[str]:
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("""
+                SELECT response
+                FROM judge_cache
+                WHERE prompt_hash = ? AND expires_at > ?
+            """, (prompt_hash, datetime.utcnow().isoformat())).fetchone()
+
+            return row[0] if row else None
+
+    async def set(self, prompt_hash: str, task_type: str, response: str, ttl: Optional[int] = None) -> bool:
+        """Judge 응답 저장"""
+        try:
+            expires_at = datetime.utcnow() + timedelta(seconds=ttl or self.ttl)
+            await asyncio.to_thread(self._set, prompt_hash, task_type, response, expires_at.isoformat())
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to set judge cache: {str(e)}")
+            return False
+
+    def _set(self, prompt_hash: str, task_type: str, response: str, expires_at: str):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO judge_cache
+                (prompt_hash, task_type, response, expires_at)
+                VALUES (?, ?, ?, ?)
+            """, (prompt_hash, task_type, response, expires_at))
+
+            conn.commit()
+
+    async def cleanup_expired(self) -> int:
+        """만료된 캐시 정리"""
+        try:
+            def _cleanup() -> int:
+                with sqlite3.connect(self.db_path) as conn:
+                    deleted_count = self._delete_expired(conn)
+                    conn.commit()
+                    return deleted_count
+
+            return await asyncio.to_thread(_cleanup)
+
+        except Exception as e:
+            logger.error(f"Failed to cleanup expired judge cache: {str(e)}")
+            return 0
+
+    @staticmethod
+    def _delete_expired(conn: sqlite3.Connection) -> int:
+        """만료된 행 삭제 (expires_at은 isoformat 문자열이라 같은 형식으로 비교)"""
+        deleted_count = conn.execute(
+            "DELETE FROM judge_cache WHERE expires_at <= ?", (datetime.utcnow().isoformat(),)
+        ).rowcount
+
+        if deleted_count > 0:
+            logger.info(f"Cleaned up {deleted_count} expired judge cache entries")
+
+        return deleted_count
+
+
+async def cached_evaluate(judge, prompt: str, task_type: str, cache: Optional[JudgeCache]) -> str:
+    """캐시를 먼저 확인하고 없을 때만 judge.evaluate 호출"""
+    model_id = _model_id(judge)
+    if cache is None or model_id is None:
+        return await judge.evaluate(prompt, task_type)
+
+    key = JudgeCache.make_key(model_id, prompt, task_type)
+    cached = await cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = await judge.evaluate(prompt, task_type)
+    if _is_cacheable(result):
+        await cache.set(key, task_type, result)
+    return result
+
+
+async def cached_analyze_text(judge, prompt: str, cache: Optional[JudgeCache]) -> str:
+    """캐시를 먼저 확인하고 없을 때만 judge.analyze_text 호출"""
+    model_id = _model_id(judge)
+    if cache is None or model_id is None:
+        return await judge.analyze_text(prompt)
+
+    key = JudgeCache.make_key(model_id, prompt, "analyze_text")
+    cached = await cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = await judge.analyze_text(prompt)
+    if _is_cacheable(result):
+        await cache.set(key, "analyze_text", result)
+    return result
+
+
+def _model_id(judge) -> Optional[str]:
+    """캐시 키에 사용할 Judge 모델 식별자 (모델 ID가 없는 MockJudge 등은 None -> 캐시하지 않음)"""
+    return getattr(judge, 'judge_model', None)
+
+
+def _is_cacheable(result) -> bool:
+    """정상 응답만 캐시 (실패 메시지나 빈 응답 제외)"""
+    return isinstance(result, str) and bool(result) and not result.startswith(_FAILURE_PREFIXES)
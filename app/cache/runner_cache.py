@@ -0,0 +1,42 @@
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RunnerCache:
+    """(모델, 입력 타입, 채워진 프롬프트) SHA-256 키 기반 인메모리 LRU Runner 결과 캐시 (TTL 포함)"""
+
+    def __init__(self, max_entries: int = 1024, ttl: int = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(model_id: str, prompt: str, input_type: str) -> str:
+        """캐시 키 생성"""
+        return hashlib.sha256(f"{model_id}\x00{input_type}\x00{prompt}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """캐시된 Runner 결과 조회 (만료된 항목은 제거)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        logger.debug(f"Runner cache hit: {key[:12]}")
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Runner 결과 저장 (가득 차면 가장 오래 안 쓴 항목부터 제거)"""
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,58 @@
+import logging
+import numpy as np
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    """임베딩 코사인 유사도 기반 인메모리 캐시 (거의 같은 요청의 결과 재사용)"""
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1024):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._matrix: Optional[np.ndarray] = None  # (K, D) 정규화된 임베딩
+        self._values: List[Any] = []
+
+    def lookup(self, embedding: List[float]) -> Optional[Any]:
+        """가장 가까운 항목의 유사도가 threshold 이상이면 해당 값 반환"""
+        if self._matrix is None:
+            return None
+
+        query = self._normalize(embedding)
+        if query is None or query.shape[0] != self._matrix.shape[1]:
+            return None
+
+        scores = self._matrix @ query
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            logger.debug(f"Semantic cache hit (similarity {scores[best]:.4f})")
+            return self._values[best]
+        return None
+
+    def add(self, embedding: List[float], value: Any):
+        """임베딩과 값을 캐시에 추가 (가득 차면 가장 오래된 항목부터 제거)"""
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+
+        if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+            self._matrix = vector[np.newaxis, :]
+            self._values = [value]
+            return
+
+        self._matrix = np.vstack([self._matrix, vector])
+        self._values.append(value)
+
+        overflow = len(self._values) - self.max_entries
+        if overflow > 0:
+            self._matrix = self._matrix[overflow:]
+            del self._values[:overflow]
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        """단위 벡터로 정규화 (영벡터는 None)"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if vector.ndim != 1 or norm == 0:
+            return None
+        return vector / norm
@@ -123,6 +123,18 @@ class Settings(BaseSettings):
         "bigram": 0.5
     }
     
+    # Prompt 실행 시 동시 LLM 호출 상한 (Runner 커넥션 풀 포화 방지)
+    runner_max_concurrency: int = 32
+    # 반복 실행(repeat_count)의 동일 호출도 하나로 합칠지 여부
+    # 반복 출력 간 편차(일관성 지표)를 측정하므로 temperature=0 Runner에서만 켤 것
+    coalesce_llm_calls: bool = False
+    # 공유 가능한 호출(variance 모델, 공유가 켜진 반복 실행)의 Runner 결과를 작업 간 재사용
+    # 같은 프롬프트도 샘플링 결과가 달라질 수 있으므로 temperature=0 Runner에서만 켤 것
+    runner_cache_enabled: bool = False
+    runner_cache_size: int = 1024
+    # Variance 단계에서 입력별 병렬 처리 시 동시 임베딩 호출 상한
+    embedder_max_concurrency: int = 16
+    
     # Database
     database_url: str = "sqlite:///./prompt_eval.db"
     
@@ -130,11 +142,36 @@ class Settings(BaseSettings):
     storage_backend: str = "sqlite"  # "sqlite" (기본) or "s3" or "dynamodb_s3"
     s3_bucket_name: str = "prompt-eval-bucket"
     table_name: str = "prompt-evaluations"
+    # S3/DynamoDB 클라이언트 연결 풀 크기 (to_thread로 동시에 호출되는 boto3 호출 수만큼 소켓 재사용)
+    storage_max_pool_connections: int = 64
+    # S3에 올리는 examples.json을 들여쓰기해서 저장 (디버깅용, 기본은 공백 없는 compact JSON)
+    pretty_json_uploads: bool = False
+    # 텍스트 타입 examples.json이 이 크기(바이트)보다 작으면 S3에 올리지 않음 (기본 0 = 항상 업로드)
+    # 켜면 prompts/{id}/examples.json을 직접 읽는 외부 소비자는 해당 객체를 받지 못하고,
+    # DynamoDB 레코드의 examples 목록만 남음 (prompt 원문 등 examples.json과 형식이 다름)
+    inline_examples_max_bytes: int = 0
     
     # Cache Settings
     cache_enabled: bool = True
     cache_ttl: int = 3600  # 1 hour
     
+    # Judge 응답 캐시 (동일 프롬프트 재평가 시 LLM 호출 생략)
+    # Judge 출력이 비결정적이라 Runner/시맨틱 캐시처럼 기본 비활성화 (MockJudge는 켜도 캐시하지 않음)
+    judge_cache_enabled: bool = False
+    judge_cache_ttl: int = 7 * 24 * 3600  # 7 days
+    judge_cache_path: str = "data/judge_cache.db"
+    judge_max_concurrency: int = 16  # 정확도 평가 시 동시 Judge 호출 상한
+    
+    # 조건 추출 시맨틱 캐시 (임베딩 유사도가 threshold 이상인 요청의 결과 재사용)
+    # 입력의 작은 차이(예: 글자 수 제한)가 무시될 수 있어 기본 비활성화
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.95
+    
+    # 출력 임베딩 LRU 캐시 (작업 간 동일 출력 재임베딩 생략)
+    embedding_cache_enabled: bool = True
+    embedding_cache_size: int = 1024
+    embedding_cache_dtype: str = "float32"  # "float16"이면 캐시 메모리 절반 (유사도 오차 약 1e-3)
+    
     # Mock Mode (테스트용)
     mock_mode: bool = True  # AWS 없이 테스트할 때 True
     
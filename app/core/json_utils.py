@@ -0,0 +1,27 @@
+"""
+JSON 직렬화 헬퍼 - orjson이 설치되어 있으면 사용하고, 없으면 표준 json으로 대체
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성 (pip install ".[speedups]")
+    orjson = None
+
+def loads(data: Union[str, bytes]) -> Any:
+    """JSON 문자열/바이트 파싱 (실패 시 json.JSONDecodeError 계열 예외)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """UTF-8 JSON 바이트로 직렬화 (indent=True면 2칸 들여쓰기, orjson 사용 시 numpy 배열도 허용)"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
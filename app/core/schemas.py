@@ -116,8 +116,9 @@ class JobResponse(BaseModel):
 class JobListResponse(BaseModel):
     jobs: List[JobResponse]
     total: int
-    page: int
+    page: Optional[int] = None  # cursor로 조회한 경우 None
     size: int
+    next_cursor: Optional[str] = None  # 다음 페이지 조회용 커서 (키셋 페이지네이션 지원 저장소)
 
 class CompareResponse(BaseModel):
     model_config = ConfigDict(protected_namespaces=())
@@ -221,6 +222,21 @@ class S3ExamplesData(BaseModel):
     created_at: str = Field(..., description="생성 일시")
 
 
+def _first_outputs_by_input(job: JobResponse) -> Dict[int, str]:
+    """입력 인덱스 -> 대표 출력(첫 번째 출력) 매핑 (입력마다 전체 실행 결과를 다시 훑지 않도록)"""
+    executions = job.result.execution_results.get('executions', []) if job.result and job.result.execution_results else []
+    
+    first_outputs = {}
+    for exec_data in executions:
+        input_index = exec_data.get('input_index')
+        # 같은 입력의 실행 결과가 여러 개면 첫 번째 것만 사용
+        if input_index in first_outputs:
+            continue
+        outputs = exec_data.get('outputs', [])
+        first_outputs[input_index] = outputs[0] if outputs else None
+    return first_outputs
+
+
 def convert_job_to_dynamodb_record(
     job: JobResponse,
     title: str,
@@ -250,40 +266,26 @@ def convert_job_to_dynamodb_record(
         gsi1_sk = f"USER#{user_id}#{created_at_str}"
         create_user = f"USER#{user_id}"
     
-    # 예시 입력-출력 쌍 생성
-    examples = []
-    executions = job.result.execution_results.get('executions', []) if job.result and job.result.execution_results else []
-    
-    for i, example_input in enumerate(job.example_inputs):
-        # 해당 입력의 출력 찾기
-        output = None
-        output_s3_url = None
-        
-        for exec_data in executions:
-            if exec_data.get('input_index') == i:
-                outputs = exec_data.get('outputs', [])
-                if outputs:
-                    # 첫 번째 출력 사용 (대표 출력)
-                    if job.prompt_type == PromptType.TYPE_B_IMAGE:
-                        # 이미지는 S3 URL
-                        if s3_bucket:
-                            output_s3_url = f"s3://{s3_bucket}/prompts/{job.request_id}/images/output_{i}.png"
-                    else:
-                        # 텍스트는 직접 저장
-                        output = outputs[0]
-                break
-        
-        example_pair = {
-            "index": i,
-            "input": example_input.model_dump(),
-        }
-        
-        if job.prompt_type == PromptType.TYPE_B_IMAGE:
-            example_pair["output_s3_url"] = output_s3_url
-        else:
-            example_pair["output"] = output
-        
-        examples.append(example_pair)
+    # 예시 입력-출력 쌍 생성 (입력별 대표 출력은 한 번만 인덱싱)
+    first_outputs = _first_outputs_by_input(job)
+    if job.prompt_type == PromptType.TYPE_B_IMAGE:
+        # 이미지는 S3 URL
+        image_url_prefix = f"s3://{s3_bucket}/prompts/{job.request_id}/images/output_" if s3_bucket else None
+        examples = [
+            {
+                "index": i,
+                "input": example_input.model_dump(),
+                "output_s3_url": f"{image_url_prefix}{i}.png"
+                if image_url_prefix and first_outputs.get(i) is not None else None
+            }
+            for i, example_input in enumerate(job.example_inputs)
+        ]
+    else:
+        # 텍스트는 직접 저장
+        examples = [
+            {"index": i, "input": example_input.model_dump(), "output": first_outputs.get(i)}
+            for i, example_input in enumerate(job.example_inputs)
+        ]
     
     # S3 URL 생성
     examples_s3_url = None
@@ -317,30 +319,18 @@ def convert_job_to_dynamodb_record(
 def create_s3_examples_data(job: JobResponse) -> S3ExamplesData:
     """S3 저장용 예시 데이터 생성"""
     
-    examples = []
-    executions = job.result.execution_results.get('executions', []) if job.result and job.result.execution_results else []
+    first_outputs = _first_outputs_by_input(job)
+    is_image = job.prompt_type == PromptType.TYPE_B_IMAGE
     
+    examples = []
     for i, example_input in enumerate(job.example_inputs):
-        output = None
-        output_s3_url = None
-        
-        for exec_data in executions:
-            if exec_data.get('input_index') == i:
-                outputs = exec_data.get('outputs', [])
-                if outputs:
-                    if job.prompt_type == PromptType.TYPE_B_IMAGE:
-                        output_s3_url = f"images/output_{i}.png"
-                    else:
-                        output = outputs[0]
-                break
-        
-        example_pair = ExamplePair(
+        output = first_outputs.get(i)
+        examples.append(ExamplePair(
             index=i,
             input=example_input.model_dump(),
-            output=output,
-            output_s3_url=output_s3_url
-        )
-        examples.append(example_pair)
+            output=None if is_image else output,
+            output_s3_url=f"images/output_{i}.png" if is_image and output is not None else None
+        ))
     
     return S3ExamplesData(
         prompt_id=job.request_id,
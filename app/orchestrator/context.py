@@ -9,6 +9,9 @@ from app.storage.sqlite_repo import SQLiteRepository
 from app.storage.s3_repo import S3Repository
 from app.storage.dynamodb_s3_repo import DynamoDBS3Repository
 from app.cache.cache import Cache
+from app.cache.semantic_cache import SemanticCache
+from app.cache.embedding_cache import EmbeddingCache
+from app.cache.runner_cache import RunnerCache
 from app.core.config import settings
 
 class ExecutionContext:
@@ -16,6 +19,18 @@ class ExecutionContext:
     
     def __init__(self):
         self.cache = Cache() if settings.cache_enabled else None
+        self.semantic_cache = (
+            SemanticCache(settings.semantic_cache_threshold)
+            if settings.semantic_cache_enabled else None
+        )
+        self.embedding_cache = (
+            EmbeddingCache(settings.embedding_cache_size, settings.embedding_cache_dtype)
+            if settings.embedding_cache_enabled else None
+        )
+        self.runner_cache = (
+            RunnerCache(settings.runner_cache_size, settings.cache_ttl)
+            if settings.runner_cache_enabled else None
+        )
         
         # 저장소 선택
         if settings.storage_backend == "dynamodb_s3":
@@ -60,4 +75,13 @@ class ExecutionContext:
         return self.storage
     
     def get_cache(self) -> Optional[Cache]:
-        return self.cache
\ No newline at end of file
+        return self.cache
+    
+    def get_semantic_cache(self) -> Optional[SemanticCache]:
+        return self.semantic_cache
+    
+    def get_embedding_cache(self) -> Optional[EmbeddingCache]:
+        return self.embedding_cache
+    
+    def get_runner_cache(self) -> Optional[RunnerCache]:
+        return self.runner_cache
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+프롬프트 템플릿 유틸리티 - {{변수명}} 플레이스홀더 치환
+"""
+import json
+import re
+
+# {{변수명}} 형태의 플레이스홀더
+_PLACEHOLDER_RE = re.compile(r'\{\{.*?\}\}')
+_INPUT_PLACEHOLDER_RE = re.compile(r'\{\{(?:input)?\}\}')
+
+class PromptTemplate:
+    """프롬프트를 한 번만 분석해 두고 입력마다 재사용하는 템플릿 ({{변수명}} 플레이스홀더 치환)"""
+
+    def __init__(self, prompt: str):
+        self.prompt = prompt
+        self._has_braces = "{{" in prompt
+        self._has_placeholder = self._has_braces and bool(_PLACEHOLDER_RE.search(prompt))
+        # {{}}, {{input}} 기준으로 미리 나눠 두면 일반 텍스트 입력은 join 한 번으로 채워짐
+        self._segments = _INPUT_PLACEHOLDER_RE.split(prompt) if self._has_braces else [prompt]
+
+    def fill(self, input_content: str) -> str:
+        """플레이스홀더를 실제 입력으로 치환"""
+        # 플레이스홀더가 없으면 정규식/JSON 파싱 없이 맨 뒤에 입력 추가
+        if not self._has_braces:
+            return f"{self.prompt}\n\n{input_content}"
+
+        # 1. 기본 플레이스홀더 {{}}, {{input}}은 입력 전체로 치환
+        # 2. input_content가 JSON 객체인 경우 각 {{key}}를 value로 치환 (같은 키는 JSON 값 우선)
+        # 일반 텍스트 입력은 '{'로 시작하지 않으므로 파싱(예외 생성) 자체를 생략
+        data = None
+        if input_content.lstrip().startswith('{'):
+            try:
+                data = json.loads(input_content)
+            except ValueError:
+                data = None
+
+        if isinstance(data, dict) and data:
+            replacements = {"{{}}": input_content, "{{input}}": input_content}
+            replacements.update({f"{{{{{key}}}}}": str(value) for key, value in data.items()})
+            pattern = re.compile("|".join(
+                re.escape(placeholder) for placeholder in sorted(replacements, key=len, reverse=True)
+            ))
+            # 모든 플레이스홀더를 한 번의 스캔으로 치환
+            # (프롬프트에 JSON 예시 등 중괄호가 들어 있을 수 있어 str.format_map은 사용하지 않음)
+            result = pattern.sub(lambda match: replacements[match.group(0)], self.prompt)
+        else:
+            result = input_content.join(self._segments)
+
+        # 3. 플레이스홀더가 없었으면 맨 뒤에 입력 추가
+        if not self._has_placeholder:
+            result = f"{result}\n\n{input_content}"
+
+        return result
+
+
+def fill_prompt(prompt: str, input_content: str) -> str:
+    """프롬프트의 {{변수명}} 플레이스홀더를 실제 입력으로 치환 (여러 입력에는 PromptTemplate 재사용)"""
+    return PromptTemplate(prompt).fill(input_content)
@@ -9,6 +9,8 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+
 class DensityStage:
     """정보 밀도 계산 단계"""
     
@@ -95,21 +97,15 @@ class DensityStage:
     
     def _calculate_ngram_density(self, words: List[str], n: int) -> float:
         """n-gram 밀도 계산"""
-        if len(words) < n:
-            return 0.0
-        
-        # n-gram 생성
-        ngrams = []
-        for i in range(len(words) - n + 1):
-            ngram = ' '.join(words[i:i+n])
-            ngrams.append(ngram)
-        
-        if not ngrams:
+        total_ngrams = len(words) - n + 1
+        if total_ngrams <= 0:
             return 0.0
         
-        # 고유 n-gram 비율
-        unique_ngrams = len(set(ngrams))
-        total_ngrams = len(ngrams)
+        # 토큰 리스트를 다시 문자열로 합치지 않고 튜플 n-gram으로 고유 개수 계산
+        if n == 1:
+            unique_ngrams = len(set(words))
+        else:
+            unique_ngrams = len(set(zip(*(words[i:] for i in range(n)))))
         
         return unique_ngrams / total_ngrams
     
@@ -119,9 +115,5 @@ class DensityStage:
         text = text.lower()
         
         # 특수문자 제거 (단어 경계는 유지)
-        text = re.sub(r'[^\w\s]', ' ', text)
-        
-        # 연속된 공백 제거
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
\ No newline at end of file
+        # 연속 공백은 split()이 처리하므로 별도로 정리하지 않음
+        return _NON_WORD_RE.sub(' ', text)
\ No newline at end of file
@@ -1,14 +1,24 @@
 import logging
-import asyncio
 import re
-from typing import Dict, Any, List, Optional
+import asyncio
+from collections import Counter
+from statistics import fmean
+from typing import Dict, Any, List
 from app.orchestrator.context import ExecutionContext
-from app.core.schemas import MetricScore, ExampleInput, ClaimType, Verdict
+from app.core.schemas import MetricScore, ExampleInput
 from app.adapters.fact_checker import PerplexityClient
 from app.cache.sqlite_cache import SQLiteCache
+from app.cache.judge_cache import JudgeCache, cached_analyze_text
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# claim으로 인정하는 최소 길이 (이보다 짧은 출력은 Judge 호출 없이 claim 없음 처리)
+_MIN_CLAIM_LENGTH = 10
+
+# 문자나 숫자가 하나라도 있는지 확인 (기호/공백만 있는 출력 사전 필터)
+_WORD_CHAR_RE = re.compile(r'[^\W_]')
+
 class JudgeStage:
     """환각 탐지 단계 - Perplexity 기반 사실 검증 (SQLite 캐싱)"""
     
@@ -16,6 +26,7 @@ class JudgeStage:
         self.context = context
         self.perplexity_client = PerplexityClient()
         self.cache = SQLiteCache("fact_check_cache.db")
+        self.judge_cache = JudgeCache() if settings.judge_cache_enabled else None
     
     async def execute(
         self, 
@@ -36,57 +47,50 @@ class JudgeStage:
             executions = execution_results['executions']
             
             # [1단계] 모든 출력에서 claim 병렬 추출
-            claim_extraction_tasks = []
-            output_info = []  # 출력 정보 저장
-            
-            for exec_data in executions:
-                input_index = exec_data['input_index']
-                outputs = exec_data['outputs']
-                
-                for output_idx, output in enumerate(outputs):
-                    if output.strip():
-                        task = self._extract_claims_from_output(judge, output)
-                        claim_extraction_tasks.append(task)
-                        output_info.append({
-                            'input_index': input_index,
-                            'output_index': output_idx,
-                            'output': output
-                        })
-            
-            logger.info(f"Extracting claims from {len(claim_extraction_tasks)} outputs in parallel")
+            # 같은 출력이 반복되는 경우가 많으므로 고유한 출력당 한 번만 Judge 호출
+            output_counts = Counter(
+                output
+                for exec_data in executions
+                for output in exec_data['outputs']
+                if output.strip()
+            )
+            unique_outputs = list(output_counts)
+            
+            logger.info("Extracting claims from %d unique outputs (%d total) in parallel",
+                        len(unique_outputs), sum(output_counts.values()))
             
             # 병렬 claim 추출
-            extraction_results = await asyncio.gather(*claim_extraction_tasks, return_exceptions=True)
+            extraction_results = await asyncio.gather(
+                *(self._extract_claims_from_output(judge, output) for output in unique_outputs),
+                return_exceptions=True
+            )
             
             # [2단계] claim 통합 및 중복 제거
             all_claims = []
-            claim_sources = {}  # claim -> 출처 정보
             
             for i, result in enumerate(extraction_results):
                 if isinstance(result, Exception):
-                    logger.error(f"Claim extraction failed for output {i}: {str(result)}")
+                    logger.error("Claim extraction failed for output %d: %s", i, result)
                     continue
                 
+                output_claims = []
                 if result and 'claims' in result:
                     for claim in result['claims']:
                         claim_text = claim.get('claim', '').strip()
-                        if claim_text and len(claim_text) > 10:  # 최소 길이 필터
-                            all_claims.append(claim_text)
-                            if claim_text not in claim_sources:
-                                claim_sources[claim_text] = []
-                            claim_sources[claim_text].append(output_info[i])
+                        if claim_text and len(claim_text) > _MIN_CLAIM_LENGTH:  # 최소 길이 필터
+                            output_claims.append(claim_text)
                 elif isinstance(result, list):
                     # 직접 claim 리스트가 반환된 경우
                     for claim_text in result:
-                        if claim_text and len(claim_text) > 10:
-                            all_claims.append(claim_text)
-                            if claim_text not in claim_sources:
-                                claim_sources[claim_text] = []
-                            claim_sources[claim_text].append(output_info[i])
+                        if claim_text and len(claim_text) > _MIN_CLAIM_LENGTH:
+                            output_claims.append(claim_text)
+                
+                # 중복 출력 수만큼 반영 (total_claims 집계 유지)
+                all_claims.extend(output_claims * output_counts[unique_outputs[i]])
             
             # 중복 제거
             unique_claims = list(set(all_claims))
-            logger.info(f"Found {len(unique_claims)} unique claims from {len(all_claims)} total claims")
+            logger.info("Found %d unique claims from %d total claims", len(unique_claims), len(all_claims))
             
             if not unique_claims:
                 logger.warning("No verifiable claims found in outputs")
@@ -105,34 +109,41 @@ class JudgeStage:
             new_claims = []
             cached_scores = {}
             
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
             for claim in unique_claims:
                 cached_result = await self.cache.get_fact_check(claim)
                 if cached_result:
                     cached_scores[claim] = cached_result['score']
-                    logger.debug(f"Using cached score for claim: {claim[:50]}...")
+                    if debug_enabled:
+                        logger.debug("Using cached score for claim: %s...", claim[:50])
                 else:
                     new_claims.append(claim)
             
-            logger.info(f"Cache hits: {len(cached_scores)}, New claims to verify: {len(new_claims)}")
+            logger.info("Cache hits: %d, New claims to verify: %d", len(cached_scores), len(new_claims))
             
             # [4단계] Perplexity로 새 claim들 병렬 검증
             new_scores = {}
             if new_claims:
-                logger.info(f"Batch verifying {len(new_claims)} claims with Perplexity")
+                logger.info("Batch verifying %d claims with Perplexity", len(new_claims))
+                
+                def on_verified(index: int, score: float):
+                    # 검증이 끝나는 대로 결과 반영 (진행 상황 추적)
+                    new_scores[new_claims[index]] = score
+                    if debug_enabled:
+                        logger.debug("Verified %d/%d claims", len(new_scores), len(new_claims))
                 
                 try:
-                    scores = await self.perplexity_client.verify_claims_batch(new_claims)
+                    await self.perplexity_client.verify_claims_batch(new_claims, on_result=on_verified)
                     
-                    for claim, score in zip(new_claims, scores):
-                        new_scores[claim] = score
+                    for claim, score in new_scores.items():
                         # SQLite 캐시에 저장 (7일 TTL)
                         await self.cache.set_fact_check(claim, {'score': score}, ttl=7*24*3600)
                         
                 except Exception as e:
-                    logger.error(f"Perplexity batch verification failed: {str(e)}")
-                    # 실패 시 기본 점수 할당
+                    logger.error("Perplexity batch verification failed: %s", e)
+                    # 실패 시 아직 결과가 없는 claim에 기본 점수 할당
                     for claim in new_claims:
-                        new_scores[claim] = 50.0  # 중간 점수
+                        new_scores.setdefault(claim, 50.0)  # 중간 점수
             
             # [5단계] 모든 점수 통합
             all_scores = {**cached_scores, **new_scores}
@@ -140,16 +151,16 @@ class JudgeStage:
             # [6단계] 최종 점수 계산
             if all_scores:
                 # 개별 claim 점수들의 평균 (0-100 범위)
-                individual_scores = list(all_scores.values())
-                average_score = sum(individual_scores) / len(individual_scores)
+                average_score = fmean(all_scores.values())
                 
                 # 환각 탐지 관점에서 점수 해석
                 # 높은 점수 = 사실 확인됨 = 환각 적음
                 # 낮은 점수 = 사실 확인 안됨 = 환각 많음
                 final_score = 100.0 - average_score  # 역전시켜서 환각 점수로 변환
                 
-                logger.info(f"Parallel hallucination detection completed: {final_score:.3f} "
-                          f"(unique claims: {len(unique_claims)}, average verification: {average_score:.1f})")
+                logger.info("Parallel hallucination detection completed: %.3f "
+                            "(unique claims: %d, average verification: %.1f)",
+                            final_score, len(unique_claims), average_score)
             else:
                 final_score = 100.0  # 검증할 claim이 없으면 환각 없음
                 average_score = 100.0
@@ -177,11 +188,16 @@ class JudgeStage:
             return MetricScore(score=final_score, details=details)
             
         except Exception as e:
-            logger.error(f"Hallucination detection failed: {str(e)}")
+            logger.error("Hallucination detection failed: %s", e)
             return MetricScore(score=0.0, details={'error': str(e)})
     
     async def _extract_claims_from_output(self, judge, output: str) -> List[str]:
         """출력에서 검증 가능한 claim들을 추출"""
+        # 검증할 사실이 있을 수 없는 출력은 LLM 호출 생략
+        stripped = output.strip()
+        if len(stripped) <= _MIN_CLAIM_LENGTH or not _WORD_CHAR_RE.search(stripped):
+            return []
+        
         try:
             # LLM에게 검증 가능한 사실 주장 추출 요청
             prompt = f"""다음 텍스트에서 외부 자료로 검증 가능한 구체적인 사실 주장들을 추출해주세요.
@@ -196,7 +212,7 @@ class JudgeStage:
 
 각 사실 주장을 한 줄씩 출력해주세요. 없으면 NONE을 출력하세요."""
             
-            result = await judge.analyze_text(prompt)
+            result = await cached_analyze_text(judge, prompt, self.judge_cache)
             
             if result.strip().upper() == "NONE":
                 return []
@@ -205,11 +221,11 @@ class JudgeStage:
             claims = []
             for line in result.split('\n'):
                 line = line.strip()
-                if line and line.upper() != "NONE" and len(line) > 10:
+                if line and line.upper() != "NONE" and len(line) > _MIN_CLAIM_LENGTH:
                     claims.append(line)
             
             return claims
             
         except Exception as e:
-            logger.error(f"Failed to extract claims from output: {str(e)}")
+            logger.error("Failed to extract claims from output: %s", e)
             return []
\ No newline at end of file
@@ -1,18 +1,139 @@
 import logging
-import json
+import copy
 import asyncio
-from typing import Dict, Any, List
+import hashlib
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
 from app.orchestrator.context import ExecutionContext
 from app.core.schemas import MetricScore, ExampleInput, PromptType
 from app.core.config import settings
+from app.core import json_utils
+from app.cache.judge_cache import JudgeCache, cached_evaluate
 
 logger = logging.getLogger(__name__)
 
+# 한 번의 Judge 호출로 함께 평가할 최대 출력 수 (응답 길이 제한 고려)
+_COMPLIANCE_BATCH_SIZE = 5
+
+# 준수 상태별 점수 (알 수 없는 상태는 '애매함'과 같은 50점)
+_STATUS_SCORE = {'지킴': 100.0, '안지킴': 0.0, '애매함': 50.0}
+
+# Judge 프롬프트 템플릿 (호출마다 f-string을 새로 만들지 않도록 모듈 로드 시 한 번만 생성)
+_EXTRACT_TMPL = """
+다음 프롬프트를 분석하여 명시적 조건과 방향성을 추출해주세요.
+
+프롬프트: %(prompt)s
+입력 내용: %(input_content)s
+
+다음 형식으로 JSON 응답해주세요:
+{
+    "explicit_conditions": [
+        "조건1: 구체적인 요구사항",
+        "조건2: 형식이나 길이 제한",
+        "조건3: 포함해야 할 내용"
+    ],
+    "direction": "프롬프트가 지시하는 핵심 방향성과 목적"
+}
+
+명시적 조건은 구체적으로 언급된 요구사항만 포함하고, 방향성은 전체적인 의도를 요약해주세요.
+"""
+
+_EVAL_TMPL = """
+다음 조건들이 출력에서 얼마나 잘 지켜졌는지 평가해주세요. %(model_note)s
+
+명시적 조건들:
+%(conditions)s
+
+방향성/핵심 과정:
+%(direction)s
+
+출력 내용:
+%(output)s
+
+각 조건에 대해 다음 중 하나로 평가해주세요:
+- "지킴": 조건을 명확히 준수함
+- "안지킴": 조건을 명확히 위반함  
+- "애매함": 판단하기 어렵거나 부분적으로만 준수
+
+다음 JSON 형식으로 응답해주세요:
+{
+    "explicit_conditions_compliance": [
+        {"condition": "조건1", "status": "지킴|안지킴|애매함", "reason": "판단 근거"},
+        {"condition": "조건2", "status": "지킴|안지킴|애매함", "reason": "판단 근거"}
+    ],
+    "direction_compliance": {"status": "지킴|안지킴|애매함", "reason": "방향성 준수 여부와 근거"},
+    "overall_assessment": "전체적인 평가 요약"
+}
+"""
+
+_BATCH_EVAL_TMPL = """
+다음 조건들이 각 출력에서 얼마나 잘 지켜졌는지 평가해주세요. %(model_note)s
+
+명시적 조건들:
+%(conditions)s
+
+방향성/핵심 과정:
+%(direction)s
+
+평가할 출력들 (총 %(output_count)d개):
+%(outputs)s
+
+각 출력마다, 각 조건에 대해 다음 중 하나로 평가해주세요:
+- "지킴": 조건을 명확히 준수함
+- "안지킴": 조건을 명확히 위반함  
+- "애매함": 판단하기 어렵거나 부분적으로만 준수
+
+출력마다 객체 하나씩, output_index 순서대로 다음 JSON 배열 형식으로만 응답해주세요:
+[
+    {
+        "output_index": 1,
+        "explicit_conditions_compliance": [
+            {"condition": "조건1", "status": "지킴|안지킴|애매함", "reason": "판단 근거"}
+        ],
+        "direction_compliance": {"status": "지킴|안지킴|애매함", "reason": "방향성 준수 여부와 근거"},
+        "overall_assessment": "전체적인 평가 요약"
+    }
+]
+"""
+
+def _extract_json(text: str, expected_type: type = dict) -> Optional[Any]:
+    """
+    Judge 응답에서 JSON 값 추출
+    - 순수 JSON이면 바로 파싱
+    - 아니면 첫 여는 괄호부터 마지막 닫는 괄호까지 잘라서 파싱 (설명 문구, 코드 펜스 허용)
+    """
+    if not text:
+        return None
+    
+    try:
+        parsed = json_utils.loads(text)
+        if isinstance(parsed, expected_type):
+            return parsed
+    except ValueError:
+        pass
+    
+    open_char, close_char = ('[', ']') if expected_type is list else ('{', '}')
+    start = text.find(open_char)
+    end = text.rfind(close_char)
+    if start == -1 or end <= start:
+        return None
+    
+    try:
+        parsed = json_utils.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, expected_type) else None
+
 class RelevanceStage:
     """정확도 계산 단계 - AI 기반 조건 준수 평가"""
     
     def __init__(self, context: ExecutionContext):
         self.context = context
+        self.judge_cache = JudgeCache() if settings.judge_cache_enabled else None
+        # 동시에 진행되는 Judge 호출 수 제한 (rate limit 방지)
+        self._judge_semaphore = asyncio.Semaphore(settings.judge_max_concurrency)
+        # 실행 중 같은 조건 + 같은 출력의 준수 평가 재사용 (조건 해시, 출력 해시, 입력 타입, 프롬프트 타입)
+        self._compliance_cache: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
     
     async def execute(
         self, 
@@ -32,6 +153,7 @@ class RelevanceStage:
         try:
             judge = self.context.get_judge()
             executions = execution_results['executions']
+            exec_by_idx = {e['input_index']: e for e in executions}
             
             # 모든 입력에 대해 병렬로 처리
             logger.info(f"Processing {len(example_inputs)} inputs in parallel")
@@ -41,7 +163,7 @@ class RelevanceStage:
                 # 1. 입력 프롬프트에서 조건과 방향성 추출
                 conditions = await self._extract_conditions(judge, prompt, example_input.content)
                 
-                if not conditions.get('explicit_conditions') and not conditions.get('direction'):
+                if not self._has_conditions(conditions):
                     logger.warning(f"No conditions extracted for input {i}")
                     return {
                         'input_index': i,
@@ -51,7 +173,7 @@ class RelevanceStage:
                     }
                 
                 # 해당 입력의 출력들 찾기
-                exec_data = next((e for e in executions if e['input_index'] == i), None)
+                exec_data = exec_by_idx.get(i)
                 if not exec_data:
                     logger.warning(f"No execution data for input {i}")
                     return {
@@ -61,23 +183,29 @@ class RelevanceStage:
                         'evaluation_details': []
                     }
                 
-                # 2. 각 출력에 대해 조건 준수 평가 (병렬)
-                async def evaluate_single_output(j: int, output: str):
-                    if not output.strip():
-                        return {'output_index': j, 'score': 0.0, 'evaluation': None}
-                    
-                    evaluation = await self._evaluate_compliance(
-                        judge, conditions, output, example_input.input_type, prompt_type
-                    )
-                    score = self._calculate_compliance_score(evaluation)
-                    return {'output_index': j, 'score': score, 'evaluation': evaluation}
+                # 2. 출력들의 조건 준수 평가 (Judge 호출 한 번에 여러 출력을 묶어서 평가)
+                outputs = exec_data['outputs']
+                non_empty_indices = [j for j, output in enumerate(outputs) if output.strip()]
+                if not non_empty_indices:
+                    logger.warning(f"No non-empty outputs for input {i}")
+                    return {
+                        'input_index': i,
+                        'score': 0.0,
+                        'conditions': conditions,
+                        'evaluation_details': [],
+                        'output_count': len(outputs)
+                    }
+                
+                evaluations = await self._evaluate_compliance_batch(
+                    judge, conditions, [outputs[j] for j in non_empty_indices],
+                    example_input.input_type, prompt_type
+                )
+                evaluation_by_index = dict(zip(non_empty_indices, evaluations))
                 
-                # 출력들 병렬 평가
-                output_tasks = [
-                    evaluate_single_output(j, output) 
-                    for j, output in enumerate(exec_data['outputs'])
-                ]
-                output_results = await asyncio.gather(*output_tasks, return_exceptions=True)
+                # 점수 계산은 입력 단위로 묶어 스레드 풀에서 실행 (이벤트 루프 점유 방지)
+                output_results = await asyncio.get_running_loop().run_in_executor(
+                    None, self._score_outputs, len(outputs), evaluation_by_index
+                )
                 
                 # 결과 처리
                 output_scores = []
@@ -100,24 +228,24 @@ class RelevanceStage:
                     'output_count': len(output_scores)
                 }
             
-            # 모든 입력 병렬 처리
-            import asyncio
+            # 모든 입력 병렬 처리 (끝나는 대로 결과 집계)
             input_tasks = [
                 process_single_input(i, example_input)
                 for i, example_input in enumerate(example_inputs)
             ]
-            input_results = await asyncio.gather(*input_tasks, return_exceptions=True)
             
-            # 결과 집계
-            all_accuracy_scores = []
+            # 입력 순서대로 점수 기록 (처리에 실패한 입력은 0점)
+            all_accuracy_scores = np.zeros(len(input_tasks), dtype=np.float64)
             details = {'per_input_scores': [], 'extracted_conditions': []}
             
-            for result in input_results:
-                if isinstance(result, Exception):
-                    logger.error(f"Input processing failed: {str(result)}")
-                    all_accuracy_scores.append(0.0)
+            for completed, future in enumerate(asyncio.as_completed(input_tasks), 1):
+                try:
+                    result = await future
+                except Exception as e:
+                    logger.error(f"Input processing failed: {str(e)}")
                 else:
-                    all_accuracy_scores.append(result['score'])
+                    logger.info(f"Accuracy evaluated for input {result['input_index']} ({completed}/{len(input_tasks)})")
+                    all_accuracy_scores[result['input_index']] = result['score']
                     details['extracted_conditions'].append({
                         'input_index': result['input_index'],
                         'conditions': result['conditions']
@@ -129,8 +257,12 @@ class RelevanceStage:
                         'evaluation_details': result['evaluation_details']
                     })
             
+            # 완료 순서와 무관하게 입력 순서로 정렬
+            details['extracted_conditions'].sort(key=lambda item: item['input_index'])
+            details['per_input_scores'].sort(key=lambda item: item['input_index'])
+            
             # 전체 평균 점수 (100점 만점)
-            final_score = sum(all_accuracy_scores) / len(all_accuracy_scores) if all_accuracy_scores else 0.0
+            final_score = float(all_accuracy_scores.mean()) if len(all_accuracy_scores) else 0.0
             
             details['final_score'] = final_score
             details['note'] = 'AI-based accuracy evaluation (parallel), score out of 100'
@@ -142,33 +274,37 @@ class RelevanceStage:
             logger.error(f"Accuracy calculation failed: {str(e)}")
             return MetricScore(score=0.0, details={'error': str(e)})
     
+    async def _judge_evaluate(self, judge, prompt: str, task_type: str) -> str:
+        """동시 호출 수 제한과 캐시를 적용한 Judge 평가"""
+        async with self._judge_semaphore:
+            return await cached_evaluate(judge, prompt, task_type, self.judge_cache)
+    
     async def _extract_conditions(self, judge, prompt: str, input_content: str) -> Dict[str, Any]:
         """입력 프롬프트에서 명시적 조건과 방향성 추출"""
         
-        extraction_prompt = f"""
-다음 프롬프트를 분석하여 명시적 조건과 방향성을 추출해주세요.
-
-프롬프트: {prompt}
-입력 내용: {input_content}
-
-다음 형식으로 JSON 응답해주세요:
-{{
-    "explicit_conditions": [
-        "조건1: 구체적인 요구사항",
-        "조건2: 형식이나 길이 제한",
-        "조건3: 포함해야 할 내용"
-    ],
-    "direction": "프롬프트가 지시하는 핵심 방향성과 목적"
-}}
-
-명시적 조건은 구체적으로 언급된 요구사항만 포함하고, 방향성은 전체적인 의도를 요약해주세요.
-"""
+        # 거의 같은 (프롬프트, 입력) 조합은 이전 추출 결과 재사용
+        semantic_cache = self.context.get_semantic_cache()
+        query_embedding = None
+        if semantic_cache is not None:
+            try:
+                query_embedding = await self.context.get_embedder().embed_text(f"{prompt}\n{input_content}")
+                cached_conditions = semantic_cache.lookup(query_embedding)
+                if cached_conditions is not None:
+                    return copy.deepcopy(cached_conditions)
+            except Exception as e:
+                logger.warning(f"Semantic cache lookup failed: {str(e)}")
+                query_embedding = None
+        
+        extraction_prompt = _EXTRACT_TMPL % {'prompt': prompt, 'input_content': input_content}
         
         try:
-            result = await judge.evaluate(extraction_prompt, "condition_extraction")
+            result = await self._judge_evaluate(judge, extraction_prompt, "condition_extraction")
             # JSON 파싱 시도
-            if result.startswith('{') and result.endswith('}'):
-                return json.loads(result)
+            conditions = _extract_json(result)
+            if conditions is not None:
+                if query_embedding is not None:
+                    semantic_cache.add(query_embedding, copy.deepcopy(conditions))
+                return conditions
             else:
                 # JSON이 아닌 경우 기본 구조 반환
                 return {
@@ -191,58 +327,190 @@ class RelevanceStage:
         prompt_type: PromptType
     ) -> Dict[str, str]:
         """AI를 통한 조건 준수 평가"""
+        if not self._has_conditions(conditions):
+            return self._fallback_compliance("평가할 조건 없음", "조건이 없어 평가를 생략했습니다.")
         
-        # 이미지 출력인 경우 VLM 사용 고려
-        model_note = ""
-        if input_type == "image" or prompt_type == PromptType.TYPE_B_IMAGE:
-            model_note = "(이미지 분석 가능한 모델 사용)"
+        key = self._compliance_key(conditions, output, input_type, prompt_type)
+        if key in self._compliance_cache:
+            return self._compliance_cache[key]
         
-        evaluation_prompt = f"""
-다음 조건들이 출력에서 얼마나 잘 지켜졌는지 평가해주세요. {model_note}
-
-명시적 조건들:
-{chr(10).join(f"- {cond}" for cond in conditions.get('explicit_conditions', []))}
-
-방향성/핵심 과정:
-{conditions.get('direction', '없음')}
-
-출력 내용:
-{output}
-
-각 조건에 대해 다음 중 하나로 평가해주세요:
-- "지킴": 조건을 명확히 준수함
-- "안지킴": 조건을 명확히 위반함  
-- "애매함": 판단하기 어렵거나 부분적으로만 준수
-
-다음 JSON 형식으로 응답해주세요:
-{{
-    "explicit_conditions_compliance": [
-        {{"condition": "조건1", "status": "지킴|안지킴|애매함", "reason": "판단 근거"}},
-        {{"condition": "조건2", "status": "지킴|안지킴|애매함", "reason": "판단 근거"}}
-    ],
-    "direction_compliance": {{"status": "지킴|안지킴|애매함", "reason": "방향성 준수 여부와 근거"}},
-    "overall_assessment": "전체적인 평가 요약"
-}}
-"""
+        model_note = self._model_note(input_type, prompt_type)
+        
+        condition_lines, direction = self._format_conditions(conditions)
+        evaluation_prompt = _EVAL_TMPL % {
+            'model_note': model_note,
+            'conditions': condition_lines,
+            'direction': direction,
+            'output': output,
+        }
         
         try:
-            result = await judge.evaluate(evaluation_prompt, "compliance_evaluation")
-            if result.startswith('{') and result.endswith('}'):
-                return json.loads(result)
+            result = await self._judge_evaluate(judge, evaluation_prompt, "compliance_evaluation")
+            evaluation = _extract_json(result)
+            if evaluation is not None:
+                self._compliance_cache[key] = evaluation
+                return evaluation
             else:
                 # JSON 파싱 실패시 기본 응답
-                return {
-                    "explicit_conditions_compliance": [],
-                    "direction_compliance": {"status": "애매함", "reason": "평가 실패"},
-                    "overall_assessment": result[:200]
-                }
+                return self._fallback_compliance("평가 실패", result[:200])
         except Exception as e:
             logger.error(f"Compliance evaluation failed: {str(e)}")
-            return {
-                "explicit_conditions_compliance": [],
-                "direction_compliance": {"status": "애매함", "reason": f"평가 오류: {str(e)}"},
-                "overall_assessment": "평가 실패"
-            }
+            return self._fallback_compliance(f"평가 오류: {str(e)}", "평가 실패")
+    
+    @staticmethod
+    def _compliance_key(
+        conditions: Dict[str, Any], output: str, input_type: str, prompt_type: PromptType
+    ) -> Tuple[str, str, str, str]:
+        """실행 내 준수 평가 캐시 키"""
+        conditions_hash = hashlib.md5(repr(sorted(conditions.items())).encode('utf-8')).hexdigest()
+        output_hash = hashlib.md5(output.encode('utf-8')).hexdigest()
+        return conditions_hash, output_hash, str(input_type), str(prompt_type)
+    
+    @staticmethod
+    def _has_conditions(conditions: Dict[str, Any]) -> bool:
+        """추출된 명시적 조건이나 방향성이 하나라도 있는지 여부"""
+        return bool(conditions.get('explicit_conditions') or conditions.get('direction'))
+    
+    @staticmethod
+    def _format_conditions(conditions: Dict[str, Any]) -> tuple:
+        """조건 목록과 방향성을 프롬프트 삽입용 문자열로 변환"""
+        condition_lines = "\n".join("- " + str(cond) for cond in conditions.get('explicit_conditions', []))
+        return condition_lines, conditions.get('direction', '없음')
+    
+    @staticmethod
+    def _model_note(input_type: str, prompt_type: PromptType) -> str:
+        """이미지 출력인 경우 VLM 사용 안내 문구"""
+        if input_type == "image" or prompt_type == PromptType.TYPE_B_IMAGE:
+            return "(이미지 분석 가능한 모델 사용)"
+        return ""
+    
+    @staticmethod
+    def _fallback_compliance(reason: str, assessment: str) -> Dict[str, Any]:
+        """평가 실패 시 사용할 기본 준수 평가 (방향성 애매함)"""
+        return {
+            "explicit_conditions_compliance": [],
+            "direction_compliance": {"status": "애매함", "reason": reason},
+            "overall_assessment": assessment
+        }
+    
+    async def _evaluate_compliance_batch(
+        self,
+        judge,
+        conditions: Dict[str, Any],
+        outputs: List[str],
+        input_type: str,
+        prompt_type: PromptType
+    ) -> List[Dict[str, Any]]:
+        """
+        여러 출력의 조건 준수 여부를 묶어서 평가
+        - _COMPLIANCE_BATCH_SIZE개씩 한 번의 Judge 호출로 평가
+        - 응답에서 빠진 출력은 출력별 평가로 대체
+        """
+        if not self._has_conditions(conditions):
+            return [
+                self._fallback_compliance("평가할 조건 없음", "조건이 없어 평가를 생략했습니다.")
+                for _ in outputs
+            ]
+        
+        # 이미 평가한 출력과 중복 출력은 제외하고 새 출력만 Judge로 평가
+        keys = [self._compliance_key(conditions, output, input_type, prompt_type) for output in outputs]
+        pending: Dict[Tuple[str, str, str, str], str] = {}
+        for key, output in zip(keys, outputs):
+            if key not in self._compliance_cache:
+                pending.setdefault(key, output)
+        
+        pending_outputs = list(pending.values())
+        if len(pending_outputs) <= 1:
+            new_results = [
+                await self._evaluate_compliance(judge, conditions, output, input_type, prompt_type)
+                for output in pending_outputs
+            ]
+        else:
+            chunks = [
+                pending_outputs[start:start + _COMPLIANCE_BATCH_SIZE]
+                for start in range(0, len(pending_outputs), _COMPLIANCE_BATCH_SIZE)
+            ]
+            chunk_results = await asyncio.gather(*[
+                self._evaluate_compliance_chunk(judge, conditions, chunk, input_type, prompt_type)
+                for chunk in chunks
+            ])
+            new_results = [evaluation for chunk_result in chunk_results for evaluation in chunk_result]
+        
+        # 실패한 평가는 캐시되지 않으므로 이번 결과에서 직접 가져옴
+        results_by_key = dict(zip(pending, new_results))
+        return [
+            results_by_key[key] if key in results_by_key else self._compliance_cache[key]
+            for key in keys
+        ]
+    
+    async def _evaluate_compliance_chunk(
+        self,
+        judge,
+        conditions: Dict[str, Any],
+        outputs: List[str],
+        input_type: str,
+        prompt_type: PromptType
+    ) -> List[Dict[str, Any]]:
+        """출력 묶음 하나를 단일 Judge 호출로 평가"""
+        
+        model_note = self._model_note(input_type, prompt_type)
+        
+        outputs_text = "\n\n".join(
+            f"### 출력 {k}\n{output}" for k, output in enumerate(outputs, start=1)
+        )
+        
+        condition_lines, direction = self._format_conditions(conditions)
+        evaluation_prompt = _BATCH_EVAL_TMPL % {
+            'model_note': model_note,
+            'conditions': condition_lines,
+            'direction': direction,
+            'output_count': len(outputs),
+            'outputs': outputs_text,
+        }
+        
+        evaluations: Dict[int, Dict[str, Any]] = {}
+        try:
+            result = await self._judge_evaluate(judge, evaluation_prompt, "compliance_batch_evaluation")
+            items = _extract_json(result, list)
+            if items is not None:
+                for item in items:
+                    if not isinstance(item, dict):
+                        continue
+                    index = item.pop('output_index', None)
+                    if isinstance(index, int) and 1 <= index <= len(outputs):
+                        evaluations[index - 1] = item
+                        key = self._compliance_key(conditions, outputs[index - 1], input_type, prompt_type)
+                        self._compliance_cache[key] = item
+            else:
+                logger.warning("Batch compliance evaluation returned non-JSON response, falling back to per-output evaluation")
+        except Exception as e:
+            logger.warning(f"Batch compliance evaluation failed, falling back to per-output evaluation: {str(e)}")
+        
+        # 응답에서 누락된 출력은 개별 평가
+        missing = [j for j in range(len(outputs)) if j not in evaluations]
+        if missing:
+            fallback_results = await asyncio.gather(*[
+                self._evaluate_compliance(judge, conditions, outputs[j], input_type, prompt_type)
+                for j in missing
+            ])
+            evaluations.update(zip(missing, fallback_results))
+        
+        return [evaluations[j] for j in range(len(outputs))]
+    
+    def _score_outputs(self, output_count: int, evaluation_by_index: Dict[int, Any]) -> List[Any]:
+        """출력별 준수 점수 계산 (평가가 없는 출력은 0점, 계산 실패는 예외 객체로 반환)"""
+        output_results = []
+        for j in range(output_count):
+            evaluation = evaluation_by_index.get(j)
+            if evaluation is None:
+                output_results.append({'output_index': j, 'score': 0.0, 'evaluation': None})
+                continue
+            try:
+                score = self._calculate_compliance_score(evaluation)
+                output_results.append({'output_index': j, 'score': score, 'evaluation': evaluation})
+            except Exception as e:
+                output_results.append(e)
+        return output_results
     
     def _calculate_compliance_score(self, evaluation: Dict[str, Any]) -> float:
         """평가 결과를 100점 만점 점수로 변환 (동적 가중치)"""
@@ -269,30 +537,13 @@ class RelevanceStage:
         
         # 명시적 조건 점수
         if explicit_conditions and explicit_weight > 0:
-            condition_scores = []
-            for cond_eval in explicit_conditions:
-                status = cond_eval.get('status', '애매함')
-                if status == '지킴':
-                    condition_scores.append(100.0)
-                elif status == '안지킴':
-                    condition_scores.append(0.0)
-                else:  # 애매함
-                    condition_scores.append(50.0)
-            
-            if condition_scores:
-                avg_condition_score = sum(condition_scores) / len(condition_scores)
-                total_score += avg_condition_score * explicit_weight
+            condition_scores = [_STATUS_SCORE.get(c.get('status'), 50.0) for c in explicit_conditions]
+            avg_condition_score = sum(condition_scores) / len(condition_scores)
+            total_score += avg_condition_score * explicit_weight
         
         # 방향성 점수
         direction_compliance = evaluation.get('direction_compliance', {})
-        direction_status = direction_compliance.get('status', '애매함')
-        
-        if direction_status == '지킴':
-            direction_score = 100.0
-        elif direction_status == '안지킴':
-            direction_score = 0.0
-        else:  # 애매함
-            direction_score = 50.0
+        direction_score = _STATUS_SCORE.get(direction_compliance.get('status'), 50.0)
         
         total_score += direction_score * direction_weight
         
@@ -1,9 +1,11 @@
 import asyncio
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from app.orchestrator.context import ExecutionContext
 from app.core.schemas import ExampleInput
 from app.core.config import settings
+from app.cache.runner_cache import RunnerCache
+from app.orchestrator.stages._prompt_util import PromptTemplate
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,28 @@ class RunStage:
     
     def __init__(self, context: ExecutionContext):
         self.context = context
+        # 동시에 진행되는 Runner 호출 수 제한
+        self._runner_semaphore = asyncio.Semaphore(settings.runner_max_concurrency)
+    
+    async def _bounded(self, coro):
+        """세마포어 안에서 Runner 호출 실행"""
+        async with self._runner_semaphore:
+            return await coro
+    
+    async def _invoke_cached(self, runner, cache: RunnerCache, model_id: str, filled_prompt: str, input_type: str):
+        """Runner 결과 캐시를 먼저 확인하고 없을 때만 호출 (성공한 결과만 저장)"""
+        key = RunnerCache.make_key(model_id, filled_prompt, input_type)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = await self._bounded(runner.invoke(
+            model=model_id,
+            prompt=filled_prompt,
+            input_type=input_type
+        ))
+        cache.put(key, result)
+        return result
     
     async def execute(
         self, 
@@ -38,6 +62,7 @@ class RunStage:
         logger.info(f"Executing prompt with {len(example_inputs)} inputs, {repeat_count} repeats each (parallel)")
         
         runner = self.context.get_runner()
+        runner_cache = self.context.get_runner_cache()
         
         # 모델 선택
         model = recommended_model or self._get_default_model(example_inputs)
@@ -45,114 +70,109 @@ class RunStage:
         # Variance 계산용 추가 모델들 가져오기
         variance_models = self._get_variance_models(prompt_type, model)
         
-        # 모든 실행 태스크 생성
-        all_tasks = []
-        task_info = []
+        # 결과 컨테이너 미리 할당 (완료되는 대로 제자리에 채움)
+        outputs_by_input: List[List[str]] = [[""] * repeat_count for _ in example_inputs]
+        # 입력별 토큰 합계 [input, output, total] (dict는 마지막에 한 번만 생성)
+        token_totals = [[0, 0, 0] for _ in example_inputs]
+        variance_outputs: Dict[str, List[str]] = {
+            variance_model: [""] * len(example_inputs) for variance_model in variance_models
+        }
+        
+        # 태스크별 결과 배치 위치: (종류, 입력 인덱스, 반복 인덱스 또는 모델)
+        placements: Dict[asyncio.Future, List[Tuple[str, int, Any]]] = {}
+        
+        # 프롬프트는 한 번만 분석하고, 입력별 프롬프트도 한 번만 채워서 반복/variance 실행에 재사용
+        template = PromptTemplate(prompt)
+        filled_prompts = [template.fill(example_input.content) for example_input in example_inputs]
+        
+        # 동일한 (모델, 프롬프트, 입력 타입) 호출은 진행 중인 태스크 하나를 공유
+        inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        
+        def invoke(model_id: str, filled_prompt: str, input_type: str, coalesce: bool) -> asyncio.Future:
+            key = (model_id, filled_prompt, input_type)
+            if coalesce and key in inflight:
+                return inflight[key]
+            if coalesce and runner_cache is not None:
+                # 공유 가능한 호출만 작업 간 캐시 사용 (반복 실행 간 편차는 보존)
+                task = asyncio.ensure_future(self._invoke_cached(runner, runner_cache, *key))
+            else:
+                task = asyncio.ensure_future(self._bounded(runner.invoke(
+                    model=model_id,
+                    prompt=filled_prompt,
+                    input_type=input_type
+                )))
+            if coalesce:
+                inflight[key] = task
+            return task
         
         # 1. 기본 실행 태스크 (기존 로직)
         for i, example_input in enumerate(example_inputs):
-            filled_prompt = self._fill_prompt(prompt, example_input.content)
+            filled_prompt = filled_prompts[i]
             
             # 각 입력에 대해 repeat_count만큼 태스크 생성
+            # 반복 실행은 출력 편차 측정용이므로 설정으로 켠 경우에만 공유
             for repeat in range(repeat_count):
-                task = runner.invoke(
-                    model=model,
-                    prompt=filled_prompt,
-                    input_type=example_input.input_type
-                )
-                all_tasks.append(task)
-                task_info.append({
-                    'type': 'main',
-                    'input_index': i,
-                    'repeat_index': repeat,
-                    'model': model,
-                    'input_content': example_input.content
-                })
-        
-        # 2. Variance 계산용 추가 태스크
+                task = invoke(model, filled_prompt, example_input.input_type, settings.coalesce_llm_calls)
+                placements.setdefault(task, []).append(('main', i, repeat))
+                if repeat == 0 and model in variance_outputs:
+                    # 기본 모델의 variance 출력은 별도 호출 없이 첫 번째 반복 결과 사용
+                    placements[task].append(('variance', i, model))
+        
+        # 2. Variance 계산용 추가 태스크 (기본 모델은 위에서 배치했으므로 제외)
+        extra_variance_models = [m for m in dict.fromkeys(variance_models) if m != model]
         for i, example_input in enumerate(example_inputs):
-            filled_prompt = self._fill_prompt(prompt, example_input.content)
-            
-            for variance_model in variance_models:
-                if variance_model != model:  # 기본 모델과 다른 경우만
-                    task = runner.invoke(
-                        model=variance_model,
-                        prompt=filled_prompt,
-                        input_type=example_input.input_type
-                    )
-                    all_tasks.append(task)
-                    task_info.append({
-                        'type': 'variance',
-                        'input_index': i,
-                        'model': variance_model,
-                        'input_content': example_input.content
-                    })
-        
-        logger.info(f"Running {len(all_tasks)} LLM calls in parallel (including variance models)")
-        
-        # 모든 태스크 병렬 실행
-        results = await asyncio.gather(*all_tasks, return_exceptions=True)
-        
-        # 결과를 분류하여 정리
-        executions = []
-        variance_outputs = {}
-        
-        # 기본 실행 결과 처리
-        for i in range(len(example_inputs)):
-            outputs = []
-            total_token_usage = {'input_tokens': 0, 'output_tokens': 0, 'total_tokens': 0}
+            filled_prompt = filled_prompts[i]
             
-            # 해당 입력의 기본 실행 결과들 수집
-            for j, (result, info) in enumerate(zip(results, task_info)):
-                if info['type'] == 'main' and info['input_index'] == i:
-                    if isinstance(result, Exception):
-                        logger.error(f"Failed execution for input {i+1}, repeat {info['repeat_index']+1}: {str(result)}")
-                        outputs.append("")
-                    else:
-                        outputs.append(result['output'])
-                        
-                        if 'token_usage' in result:
-                            for key in total_token_usage:
-                                total_token_usage[key] += result['token_usage'].get(key, 0)
+            for variance_model in extra_variance_models:
+                task = invoke(variance_model, filled_prompt, example_input.input_type, True)
+                placements.setdefault(task, []).append(('variance', i, variance_model))
+        
+        logger.info(f"Running {len(placements)} LLM calls for "
+                    f"{sum(len(slots) for slots in placements.values())} results in parallel (including variance models)")
+        
+        async def settle(task: asyncio.Future):
+            try:
+                return task, await task
+            except Exception as e:
+                return task, e
+        
+        # 모든 태스크 병렬 실행, 끝나는 대로 결과 배치
+        for future in asyncio.as_completed([settle(task) for task in placements]):
+            task, result = await future
+            failed = isinstance(result, Exception)
             
-            executions.append({
+            for kind, i, slot in placements[task]:
+                if kind == 'main':
+                    if failed:
+                        logger.error(f"Failed execution for input {i+1}, repeat {slot+1}: {str(result)}")
+                        continue
+                    outputs_by_input[i][slot] = result['output']
+                    usage = result.get('token_usage')
+                    if usage is not None:
+                        totals = token_totals[i]
+                        totals[0] += usage.get('input_tokens', 0)
+                        totals[1] += usage.get('output_tokens', 0)
+                        totals[2] += usage.get('total_tokens', 0)
+                elif failed:
+                    logger.error(f"Failed variance execution for {slot}, input {i+1}: {str(result)}")
+                else:
+                    variance_outputs[slot][i] = result['output']
+        
+        executions = [
+            {
                 'input_index': i,
-                'input_content': example_inputs[i].content,
-                'input_type': example_inputs[i].input_type,
-                'outputs': outputs,
+                'input_content': example_input.content,
+                'input_type': example_input.input_type,
+                'outputs': outputs_by_input[i],
                 'model': model,
-                'token_usage': total_token_usage
-            })
-        
-        # Variance 결과 처리
-        for variance_model in variance_models:
-            variance_outputs[variance_model] = []
-            
-            for i in range(len(example_inputs)):
-                # 해당 입력의 variance 결과 찾기
-                variance_output = ""
-                for j, (result, info) in enumerate(zip(results, task_info)):
-                    if (info['type'] == 'variance' and 
-                        info['input_index'] == i and 
-                        info['model'] == variance_model):
-                        if isinstance(result, Exception):
-                            logger.error(f"Failed variance execution for {variance_model}, input {i+1}: {str(result)}")
-                            variance_output = ""
-                        else:
-                            variance_output = result['output']
-                        break
-                    elif (info['type'] == 'main' and 
-                          info['input_index'] == i and 
-                          info['repeat_index'] == 0 and  # 첫 번째 반복만
-                          info['model'] == variance_model):
-                        # 기본 모델과 variance 모델이 같은 경우
-                        if isinstance(result, Exception):
-                            variance_output = ""
-                        else:
-                            variance_output = result['output']
-                        break
-                
-                variance_outputs[variance_model].append(variance_output)
+                'token_usage': {
+                    'input_tokens': token_totals[i][0],
+                    'output_tokens': token_totals[i][1],
+                    'total_tokens': token_totals[i][2]
+                }
+            }
+            for i, example_input in enumerate(example_inputs)
+        ]
         
         logger.info(f"Parallel execution completed: {len(executions)} inputs processed with variance models")
         return {
@@ -178,31 +198,4 @@ class RunStage:
         if has_image:
             return settings.default_models["type_b_image"]
         else:
-            return settings.default_models["type_a"]
-    
-    def _fill_prompt(self, prompt: str, input_content: str) -> str:
-        """프롬프트의 {{변수명}} 플레이스홀더를 실제 입력으로 치환"""
-        import json
-        import re
-        
-        result = prompt
-        has_placeholder = bool(re.search(r'\{\{.*?\}\}', prompt))
-        
-        # 1. input_content가 JSON인 경우 파싱해서 각 키별로 치환
-        try:
-            data = json.loads(input_content)
-            if isinstance(data, dict):
-                for key, value in data.items():
-                    # {{key}} 형태를 value로 치환
-                    result = result.replace(f"{{{{{key}}}}}", str(value))
-        except (json.JSONDecodeError, TypeError):
-            pass
-        
-        # 2. 기본 플레이스홀더 치환 (JSON이 아닌 경우)
-        result = result.replace("{{}}", input_content).replace("{{input}}", input_content)
-        
-        # 3. 플레이스홀더가 없었으면 맨 뒤에 입력 추가
-        if not has_placeholder:
-            result = f"{result}\n\n{input_content}"
-        
-        return result
\ No newline at end of file
+            return settings.default_models["type_a"]
\ No newline at end of file
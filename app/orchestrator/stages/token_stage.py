@@ -1,18 +1,36 @@
+import os
 import logging
+import re
+import functools
 import tiktoken
-from typing import Dict, Any
+from typing import Dict, Any, List
 from app.orchestrator.context import ExecutionContext
 from app.core.schemas import TokenMetricScore
 
 logger = logging.getLogger(__name__)
 
+# 플레이스홀더 제거 및 공백 정리용 패턴
+_PLACEHOLDER_STRIP_RE = re.compile(r'\{\{[^}]*\}\}')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+@functools.lru_cache(maxsize=None)
+def _get_tokenizer() -> tiktoken.Encoding:
+    """공유 토크나이저 (최초 사용 시 한 번만 로드)"""
+    return tiktoken.get_encoding("cl100k_base")
+
+@functools.lru_cache(maxsize=1024)
+def _encode_len(fixed_prompt: str) -> int:
+    """고정 프롬프트의 토큰 수 (같은 프롬프트는 다시 인코딩하지 않음)"""
+    return len(_get_tokenizer().encode(fixed_prompt))
+
 class TokenStage:
     """토큰 사용량 계산 단계"""
     
     def __init__(self, context: ExecutionContext):
         self.context = context
-        # GPT 계열 토크나이저 (근사치로 사용)
-        self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        # GPT 계열 토크나이저 (근사치로 사용, 모든 인스턴스가 공유)
+        self.tokenizer = _get_tokenizer()
     
     async def execute(self, prompt: str, execution_results: Dict[str, Any]) -> TokenMetricScore:
         """
@@ -21,33 +39,43 @@ class TokenStage:
         - 입력 내용은 변수이므로 제외
         """
         logger.info("Calculating token usage")
-        
+        return (await self.execute_many([prompt]))[0]
+    
+    async def execute_many(self, prompts: List[str]) -> List[TokenMetricScore]:
+        """
+        여러 후보 프롬프트의 토큰 사용량을 한 번에 계산
+        - 프롬프트가 여러 개면 encode_batch로 병렬 인코딩
+        """
         try:
             # 고정 프롬프트 토큰 수 계산 (플레이스홀더 제거)
-            fixed_prompt = self._remove_placeholders(prompt)
-            fixed_tokens = len(self.tokenizer.encode(fixed_prompt))
+            fixed_prompts = [self._remove_placeholders(prompt) for prompt in prompts]
+            if len(fixed_prompts) == 1:
+                token_counts = [_encode_len(fixed_prompts[0])]
+            else:
+                encoded = self.tokenizer.encode_batch(fixed_prompts, num_threads=os.cpu_count() or 1)
+                token_counts = [len(tokens) for tokens in encoded]
             
-            details = {
-                'fixed_prompt_tokens': fixed_tokens,
-                'fixed_prompt_text': fixed_prompt
-            }
-            
-            logger.info(f"Fixed prompt token count: {fixed_tokens}")
-            return TokenMetricScore(score=float(fixed_tokens), details=details)
+            scores = []
+            for fixed_prompt, fixed_tokens in zip(fixed_prompts, token_counts):
+                details = {
+                    'fixed_prompt_tokens': fixed_tokens,
+                    'fixed_prompt_text': fixed_prompt
+                }
+                logger.info(f"Fixed prompt token count: {fixed_tokens}")
+                scores.append(TokenMetricScore(score=float(fixed_tokens), details=details))
+            return scores
             
         except Exception as e:
             logger.error(f"Token calculation failed: {str(e)}")
-            return TokenMetricScore(score=0.0, details={'error': str(e)})
+            return [TokenMetricScore(score=0.0, details={'error': str(e)}) for _ in prompts]
     
     def _remove_placeholders(self, prompt: str) -> str:
-        """플레이스홀더 제거 - run_stage의 _fill_prompt와 동일한 패턴 사용"""
-        import re
-        
+        """플레이스홀더 제거 - '}'를 포함하지 않는 {{key}}만 제거 (_prompt_util의 {{.*?}} 패턴과 다름)"""
         # 1. {{key}} 형태의 플레이스홀더 제거
-        result = re.sub(r'\{\{[^}]*\}\}', '', prompt)
+        result = _PLACEHOLDER_STRIP_RE.sub('', prompt)
         
         # 2. 연속된 공백과 줄바꿈 정리
-        result = re.sub(r'\n\s*\n', '\n', result)  # 빈 줄 제거
-        result = re.sub(r'\s+', ' ', result)  # 연속 공백을 하나로
+        result = _BLANK_LINES_RE.sub('\n', result)  # 빈 줄 제거
+        result = _WHITESPACE_RE.sub(' ', result)  # 연속 공백을 하나로
         
         return result.strip()
\ No newline at end of file
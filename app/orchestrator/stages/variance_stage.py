@@ -1,44 +1,57 @@
 import logging
 import asyncio
 import numpy as np
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from app.orchestrator.context import ExecutionContext
 from app.core.schemas import MetricScore, ExampleInput, PromptType
 from app.core.config import settings
+from app.cache.embedding_cache import EmbeddingCache
+
+try:
+    import simsimd
+except ImportError:  # 선택 의존성 (pip install ".[speedups]"), 없으면 numpy 행렬 곱 사용
+    simsimd = None
 
 logger = logging.getLogger(__name__)
 
+# 결과 표시용 모델 짧은 이름
+_SHORT_NAMES: Dict[str, str] = {
+    "arn:aws:bedrock:us-east-1:261595668962:inference-profile/us.anthropic.claude-sonnet-4-5-20250929-v1:0": "Claude 4.5",
+    "anthropic.claude-3-5-sonnet-20240620-v1:0": "Claude 3.5",
+    "anthropic.claude-3-haiku-20240307-v1:0": "Claude Haiku",
+    "openai.gpt-oss-120b-1:0": "GPT OSS 120B",
+    "openai.gpt-oss-20b-1:0": "GPT OSS 20B",
+    "google.gemma-3-27b-it-v1:0": "Gemma 27B",
+    "google.gemma-3-12b-it-v1:0": "Gemma 12B",
+    "google.gemma-3-4b-it-v1:0": "Gemma 4B",
+    "amazon.titan-image-generator-v2:0": "Titan Image v2",
+    "amazon.nova-canvas-v1:0": "Nova Canvas"
+}
+
 class VarianceStage:
     """모델별 성능 편차 계산 단계 - Run Stage에서 사전 계산된 결과 사용"""
     
     def __init__(self, context: ExecutionContext):
         self.context = context
+        # 요청 단위 임베딩 캐시 (출력 텍스트 해시 -> 임베딩 태스크), 같은 출력은 한 번만 임베딩
+        self._embedding_cache: Dict[str, asyncio.Future] = {}
+        # 입력 병렬 처리 시 동시 임베딩 호출 상한
+        self._embed_semaphore = asyncio.Semaphore(settings.embedder_max_concurrency)
     
-    def _get_comparison_models(self, selected_model: str) -> List[str]:
-        """선택된 모델에 대한 비교 모델 목록 반환"""
+    def _get_comparison_models(self, selected_model: str) -> Tuple[str, ...]:
+        """선택된 모델에 대한 비교 모델 목록 반환 (변경되지 않는 튜플)"""
         # config에서 모델 패밀리 매핑 가져오기
-        comparison_models = settings.model_families.get(selected_model, [])
+        comparison_models = tuple(settings.model_families.get(selected_model, ()))
         
         if not comparison_models:
             logger.warning(f"No comparison models found for {selected_model}")
         
         return comparison_models
     
-    def _get_model_short_name(self, model_id: str) -> str:
+    @staticmethod
+    def _get_model_short_name(model_id: str) -> str:
         """모델 ID를 짧은 이름으로 변환"""
-        short_names = {
-            "arn:aws:bedrock:us-east-1:261595668962:inference-profile/us.anthropic.claude-sonnet-4-5-20250929-v1:0": "Claude 4.5",
-            "anthropic.claude-3-5-sonnet-20240620-v1:0": "Claude 3.5",
-            "anthropic.claude-3-haiku-20240307-v1:0": "Claude Haiku",
-            "openai.gpt-oss-120b-1:0": "GPT OSS 120B",
-            "openai.gpt-oss-20b-1:0": "GPT OSS 20B",
-            "google.gemma-3-27b-it-v1:0": "Gemma 27B",
-            "google.gemma-3-12b-it-v1:0": "Gemma 12B",
-            "google.gemma-3-4b-it-v1:0": "Gemma 4B",
-            "amazon.titan-image-generator-v2:0": "Titan Image v2",
-            "amazon.nova-canvas-v1:0": "Nova Canvas"
-        }
-        return short_names.get(model_id, model_id.split("/")[-1].split(":")[0])
+        return _SHORT_NAMES.get(model_id, model_id.rsplit("/", 1)[-1].split(":", 1)[0])
     
     async def execute(
         self, 
@@ -63,7 +76,7 @@ class VarianceStage:
             
             comparison_models = self._get_comparison_models(recommended_model)
             # 선택된 모델 + 비교 모델들
-            all_models = [recommended_model] + comparison_models
+            all_models = (recommended_model, *comparison_models)
             
             if len(all_models) < 2:
                 logger.warning(f"Not enough models for comparison: {all_models}")
@@ -79,97 +92,23 @@ class VarianceStage:
                 return MetricScore(score=50.0, details={'error': 'no_variance_outputs'})
             
             variance_outputs = existing_outputs['variance_outputs']
-            details = {'per_input_scores': [], 'models_used': all_models, 'used_precomputed': True}
+            details = {'per_input_scores': [], 'models_used': list(all_models), 'used_precomputed': True}
             
-            # 결과를 입력별로 처리
-            input_results = []
-            for i, example_input in enumerate(example_inputs):
-                logger.info(f"Processing results for input {i+1}/{len(example_inputs)}")
-                
-                # 모델별 출력 수집 (이미 Run Stage에서 실행됨)
-                model_outputs = {}
-                for model in all_models:
-                    if model in variance_outputs and i < len(variance_outputs[model]):
-                        model_outputs[model] = variance_outputs[model][i]
-                    else:
-                        logger.warning(f"Missing output for {model}, input {i+1}")
-                        model_outputs[model] = ""
-                
-                # 임베딩 생성 (병렬)
-                embedding_tasks = []
-                valid_models = []
-                for model, output in model_outputs.items():
-                    if output.strip():
-                        embedding_tasks.append(self._embed_single_output(embedder, output, prompt_type))
-                        valid_models.append(model)
-                
-                embeddings = {}
-                if embedding_tasks:
-                    embedding_results = await asyncio.gather(*embedding_tasks, return_exceptions=True)
-                    for model, result in zip(valid_models, embedding_results):
-                        if isinstance(result, Exception):
-                            logger.error(f"Failed to embed output from {model}: {str(result)}")
-                            embeddings[model] = None
-                        else:
-                            embeddings[model] = result
-                
-                # 유효한 임베딩만 필터링
-                valid_embeddings = {k: v for k, v in embeddings.items() if v is not None}
-                
-                if len(valid_embeddings) < 2:
-                    logger.warning(f"Not enough valid embeddings for input {i}")
-                    input_results.append({
-                        'input_index': i,
-                        'score': 0.0,
-                        'reason': 'insufficient_valid_outputs',
-                        'valid_models': list(valid_embeddings.keys()),
-                        'model_outputs': {k: v[:100] + "..." if len(v) > 100 else v for k, v in model_outputs.items()}
-                    })
-                    continue
-                
-                # 선택된 모델과 각 비교 모델 간 쌍별 유사도 계산
-                pairwise_scores = []
-                model_names = list(valid_embeddings.keys())
-                
-                # 선택된 모델의 임베딩
-                if recommended_model in valid_embeddings:
-                    main_embedding = valid_embeddings[recommended_model]
-                    
-                    for comp_model in comparison_models:
-                        if comp_model in valid_embeddings:
-                            comp_embedding = valid_embeddings[comp_model]
-                            similarity = self._cosine_similarity(main_embedding, comp_embedding)
-                            pairwise_scores.append({
-                                'model_pair': f"{self._get_model_short_name(recommended_model)} vs {self._get_model_short_name(comp_model)}",
-                                'main_model': recommended_model,
-                                'comparison_model': comp_model,
-                                'similarity': similarity,
-                                'score': similarity * 100
-                            })
-                
-                # 전체 유사도도 계산 (기존 로직)
-                all_similarities = []
-                embedding_list = list(valid_embeddings.values())
-                
-                for i_emb in range(len(embedding_list)):
-                    for j_emb in range(i_emb + 1, len(embedding_list)):
-                        similarity = self._cosine_similarity(embedding_list[i_emb], embedding_list[j_emb])
-                        all_similarities.append(similarity)
-                
-                if all_similarities:
-                    avg_similarity = sum(all_similarities) / len(all_similarities)
-                    variance_score = avg_similarity * 100
-                else:
-                    variance_score = 0.0
-                
-                input_results.append({
-                    'input_index': i,
-                    'score': variance_score,
-                    'pairwise_scores': pairwise_scores,
-                    'average_similarity': avg_similarity if all_similarities else 0.0,
-                    'valid_models': model_names,
-                    'model_outputs': {k: v[:100] + "..." if len(v) > 100 else v for k, v in model_outputs.items()}
-                })
+            # 쌍 이름(짧은 모델명)은 입력마다 만들지 않고 한 번만 계산
+            main_name = self._get_model_short_name(recommended_model)
+            pair_names = {
+                comp_model: f"{main_name} vs {self._get_model_short_name(comp_model)}"
+                for comp_model in comparison_models
+            }
+            
+            # 입력별 임베딩/유사도 계산을 병렬로 처리 (동시 임베딩 호출 수는 semaphore로 제한)
+            input_results = await asyncio.gather(*(
+                self._score_input(
+                    i, len(example_inputs), all_models, recommended_model, pair_names,
+                    variance_outputs, embedder
+                )
+                for i in range(len(example_inputs))
+            ))
             
             # 전체 평균 점수 계산
             valid_scores = [result['score'] for result in input_results if result['score'] > 0]
@@ -208,66 +147,197 @@ class VarianceStage:
             logger.error(f"Variance calculation failed: {str(e)}")
             return MetricScore(score=0.0, details={'error': str(e)})
     
-    async def _embed_single_output(self, embedder, output: str, prompt_type: PromptType):
-        """단일 출력에 대한 임베딩 생성"""
-        try:
-            if prompt_type == PromptType.TYPE_B_IMAGE:
-                # 이미지 타입의 경우 텍스트 임베딩 사용
-                return await embedder.embed_text(output)  # 단일 문자열 전달
+    async def _score_input(
+        self,
+        i: int,
+        input_count: int,
+        all_models: Tuple[str, ...],
+        recommended_model: str,
+        pair_names: Dict[str, str],
+        variance_outputs: Dict[str, List[str]],
+        embedder
+    ) -> Dict[str, Any]:
+        """단일 입력에 대한 모델 간 유사도 점수 계산"""
+        logger.info(f"Processing results for input {i+1}/{input_count}")
+        
+        # 모델별 출력 수집 (이미 Run Stage에서 실행됨)
+        model_outputs = {}
+        for model in all_models:
+            if model in variance_outputs and i < len(variance_outputs[model]):
+                model_outputs[model] = variance_outputs[model][i]
             else:
-                # 텍스트 타입
-                return await embedder.embed_text(output)  # 단일 문자열 전달
-        except Exception as e:
-            logger.error(f"Embedding failed for output: {str(e)}")
-            raise e
-    
-    def _cosine_similarity(self, vec1, vec2):
-        """코사인 유사도 계산"""
-        try:
-            # 벡터가 리스트의 리스트 형태인 경우 첫 번째 요소 사용
-            if isinstance(vec1, list) and len(vec1) > 0 and isinstance(vec1[0], list):
-                vec1 = vec1[0]
-            if isinstance(vec2, list) and len(vec2) > 0 and isinstance(vec2[0], list):
-                vec2 = vec2[0]
+                logger.warning(f"Missing output for {model}, input {i+1}")
+                model_outputs[model] = ""
+        
+        # 비교할 출력이 2개 미만이면 임베딩 호출 없이 건너뜀
+        nonempty = [(model, output) for model, output in model_outputs.items() if output and output.strip()]
+        if len(nonempty) < 2:
+            logger.warning(f"Not enough non-empty outputs for input {i}")
+            return self._insufficient_result(i, [model for model, _ in nonempty], model_outputs)
+        
+        # 완전히 같은 출력끼리 묶어서 서로 다른 출력만 임베딩 (같은 출력끼리의 유사도는 1.0)
+        unique_outputs = list(dict.fromkeys(output for _, output in nonempty))
+        if len(unique_outputs) == 1:
+            # 모든 출력이 동일하면 임베딩 호출 없이 유사도 1.0
+            model_names = [model for model, _ in nonempty]
+            S = np.ones((len(model_names), len(model_names)), dtype=np.float32)
+        else:
+            # 임베딩 생성 (서로 다른 출력들을 배치 호출 한 번으로)
+            embedding_results = await self._embed_outputs(embedder, unique_outputs)
             
-            vec1 = np.array(vec1)
-            vec2 = np.array(vec2)
+            # 유효한 임베딩만 벡터 목록으로 보관하고, 모델마다 자기 출력의 벡터 행 번호를 기록
+            row_of = {}
+            errors = {}
+            vectors = []
+            for output, result in zip(unique_outputs, embedding_results):
+                if isinstance(result, Exception):
+                    errors[output] = result
+                else:
+                    row_of[output] = len(vectors)
+                    vectors.append(result)
             
-            dot_product = np.dot(vec1, vec2)
-            norm1 = np.linalg.norm(vec1)
-            norm2 = np.linalg.norm(vec2)
+            model_names = []
+            rows = []
+            for model, output in nonempty:
+                if output in row_of:
+                    model_names.append(model)
+                    rows.append(row_of[output])
+                else:
+                    logger.error(f"Failed to embed output from {model}: {str(errors[output])}")
             
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
+            if len(model_names) < 2:
+                logger.warning(f"Not enough valid embeddings for input {i}")
+                return self._insufficient_result(i, model_names, model_outputs)
             
-            return dot_product / (norm1 * norm2)
-        except Exception as e:
-            logger.error(f"Cosine similarity calculation failed: {str(e)}")
-            return 0.0
-    
-    def _fill_prompt(self, prompt: str, input_content: str) -> str:
-        """프롬프트의 {{변수명}} 플레이스홀더를 실제 입력으로 치환"""
-        import json
-        import re
+            # 서로 다른 출력들의 코사인 유사도를 행렬 곱 한 번으로 계산한 뒤 모델 단위로 펼침
+            rows = np.asarray(rows, dtype=np.intp)
+            S = self._similarity_matrix(vectors)[np.ix_(rows, rows)]
+            S[rows[:, None] == rows[None, :]] = 1.0
         
-        result = prompt
-        has_placeholder = bool(re.search(r'\{\{.*?\}\}', prompt))
+        index_of = {model: row for row, model in enumerate(model_names)}
         
-        # 1. input_content가 JSON인 경우 파싱해서 각 키별로 치환
-        try:
-            data = json.loads(input_content)
-            if isinstance(data, dict):
-                for key, value in data.items():
-                    # {{key}} 형태를 value로 치환
-                    result = result.replace(f"{{{{{key}}}}}", str(value))
-        except (json.JSONDecodeError, TypeError):
-            pass
+        # 선택된 모델과 각 비교 모델 간 쌍별 유사도
+        pairwise_scores = []
+        if recommended_model in index_of:
+            comp_present = [m for m in pair_names if m in index_of]
+            comp_rows = np.fromiter((index_of[m] for m in comp_present), dtype=np.intp, count=len(comp_present))
+            sims = S[index_of[recommended_model], comp_rows]
+            
+            pairwise_scores = [
+                {
+                    'model_pair': pair_names[comp_model],
+                    'main_model': recommended_model,
+                    'comparison_model': comp_model,
+                    'similarity': similarity,
+                    'score': score
+                }
+                for comp_model, similarity, score in zip(comp_present, sims.tolist(), (sims * 100).tolist())
+            ]
+        
+        # 전체 유사도도 계산 (기존 로직) - 상삼각 행렬 = 모든 모델 쌍 (여기서는 항상 2개 이상)
+        avg_similarity = float(S[np.triu_indices(len(model_names), k=1)].mean())
+        variance_score = avg_similarity * 100
+        
+        return {
+            'input_index': i,
+            'score': variance_score,
+            'pairwise_scores': pairwise_scores,
+            'average_similarity': avg_similarity,
+            'valid_models': model_names,
+            'model_outputs': {k: v[:100] + "..." if len(v) > 100 else v for k, v in model_outputs.items()}
+        }
+    
+    async def _embed_outputs(self, embedder, outputs: List[str]) -> List[Any]:
+        """
+        한 입력의 출력들을 embed_text_batch 한 번으로 임베딩
+        - 이미 캐시되었거나 다른 입력에서 임베딩 중인 출력은 그 결과 재사용
+        - 이전 작업에서 임베딩한 출력은 컨텍스트의 LRU 임베딩 캐시에서 재사용
+        - 실패한 항목은 예외 객체로 반환 (캐시하지 않음)
+        """
+        loop = asyncio.get_running_loop()
+        shared_cache = self.context.get_embedding_cache()
+        keys = [EmbeddingCache.make_key(output) for output in outputs]
+        futures = {}
+        pending = {}
+        for key, output in zip(keys, outputs):
+            if key in futures:
+                continue
+            future = self._embedding_cache.get(key)
+            if future is None:
+                future = loop.create_future()
+                self._embedding_cache[key] = future
+                cached = shared_cache.get(key) if shared_cache else None
+                if cached is not None:
+                    future.set_result(cached)
+                else:
+                    pending[key] = output
+            futures[key] = future
         
-        # 2. 기본 플레이스홀더 치환 (JSON이 아닌 경우)
-        result = result.replace("{{}}", input_content).replace("{{input}}", input_content)
+        if pending:
+            # 이미지 타입도 모델 출력(텍스트)을 비교하므로 텍스트 임베딩 사용
+            try:
+                async with self._embed_semaphore:
+                    results = await embedder.embed_text_batch(list(pending.values()))
+                if len(results) != len(pending):
+                    raise ValueError(f"Expected {len(pending)} embeddings, got {len(results)}")
+            except Exception as e:
+                logger.error(f"Embedding failed for outputs: {str(e)}")
+                results = [e] * len(pending)
+            except asyncio.CancelledError:
+                # 취소 시 같은 출력을 기다리는 다른 입력이 멈추지 않도록 정리
+                for key in pending:
+                    self._embedding_cache.pop(key, None)
+                    futures[key].cancel()
+                raise
+            
+            for key, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    # 실패한 임베딩은 캐시하지 않음
+                    self._embedding_cache.pop(key, None)
+                    futures[key].set_exception(result)
+                else:
+                    # 수집 시 한 번만 정규화해서 캐시 (재사용 시 다시 정규화하지 않음)
+                    vector = self._unit_vector(result)
+                    futures[key].set_result(vector)
+                    if shared_cache:
+                        shared_cache.put(key, vector)
         
-        # 3. 플레이스홀더가 없었으면 맨 뒤에 입력 추가
-        if not has_placeholder:
-            result = f"{result}\n\n{input_content}"
+        by_key = await asyncio.gather(*(asyncio.shield(f) for f in futures.values()), return_exceptions=True)
+        by_key = dict(zip(futures, by_key))
+        return [by_key[key] for key in keys]
+    
+    @staticmethod
+    def _insufficient_result(input_index: int, valid_models: List[str], model_outputs: Dict[str, str]) -> Dict[str, Any]:
+        """비교 가능한 출력이 부족한 입력의 결과"""
+        return {
+            'input_index': input_index,
+            'score': 0.0,
+            'reason': 'insufficient_valid_outputs',
+            'valid_models': valid_models,
+            'model_outputs': {k: v[:100] + "..." if len(v) > 100 else v for k, v in model_outputs.items()}
+        }
+    
+    @staticmethod
+    def _unit_vector(vec) -> np.ndarray:
+        """임베딩을 L2 정규화된 float32 1차원 배열로 변환 (영벡터는 그대로)"""
+        # 벡터가 리스트의 리스트 형태인 경우 첫 번째 요소 사용
+        if isinstance(vec, list) and len(vec) > 0 and isinstance(vec[0], list):
+            vec = vec[0]
+        vector = np.array(vec, dtype=np.float32)
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        return vector
+    
+    @staticmethod
+    def _similarity_matrix(vectors: List[np.ndarray]) -> np.ndarray:
+        """정규화된 임베딩들의 코사인 유사도 행렬 (float32 행렬 곱 한 번, 영벡터 행은 유사도 0)"""
+        # float16으로 캐시된 벡터가 섞여 있어도 (M, D) float32 행렬 하나로 모아서 계산
+        E = np.vstack(vectors, dtype=np.float32)
         
-        return result
\ No newline at end of file
+        if simsimd is not None and E.any(axis=1).all():
+            # SIMD 커널로 코사인 거리 계산 후 유사도로 변환
+            # 대역폭을 더 줄이려면 E.astype(np.float16)을 넘겨도 됨 (정밀도 소폭 손실)
+            S = 1.0 - np.asarray(simsimd.cdist(E, E, metric="cosine"), dtype=np.float32)
+        else:
+            # 임베딩 수집 시 이미 정규화했으므로 내적이 곧 코사인 유사도
+            S = E @ E.T
+        return np.clip(S, -1.0, 1.0)  # 부동소수점 오차로 1을 넘지 않도록
\ No newline at end of file
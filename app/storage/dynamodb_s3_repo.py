@@ -1,17 +1,45 @@
-import json
+import os
+import re
+import gzip
 import uuid
 import boto3
+import asyncio
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from decimal import Decimal
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from app.storage.repo import BaseRepository
 from app.core.schemas import JobResponse, JobStatus, PromptType, ExampleInput, EvaluationResult, MetricScore
 from app.core.errors import StorageError
 from app.core.config import settings
+from app.core import json_utils
 
 logger = logging.getLogger(__name__)
 
+# DynamoDB 변환 시 그대로 두는 값 타입 (재귀 호출 생략)
+_PASSTHROUGH_TYPES = frozenset((str, int, bool, type(None), Decimal))
+
+# 프로세스 내 job_id -> created_at(정렬 키) 캐시 최대 크기
+_SORT_KEY_CACHE_SIZE = 4096
+
+# 작업 목록 조회용 GSI (고정 파티션 키 + created_at 정렬 키, 목록에 필요한 속성만 프로젝션)
+_JOB_ENTITY = 'JOB'
+_JOB_LIST_INDEX = 'jobs-by-created-at-index'
+_JOB_LIST_ATTRIBUTES = [
+    'updated_at', 'status', 'prompt_type', 'final_score', 'metrics', 's3_input_key',
+    'repeat_count', 'recommended_model', 'error_message'
+]
+
+# 이미지 Runner 출력 형식 "Generated N image(s): path1, path2"에서 첫 번째 파일 경로 추출
+_GENERATED_IMAGES_RE = re.compile(r'Generated \d+ image\(s\):\s*([^,]+)')
+
+# 생성 이미지 업로드 설정 (8MB 이상이면 멀티파트로 나눠 병렬 전송)
+_IMAGE_TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, max_concurrency=8, use_threads=True)
+
 class DynamoDBS3Repository(BaseRepository):
     """DynamoDB + S3 하이브리드 저장소 - 입력/출력 분리 저장"""
     
@@ -19,12 +47,20 @@ class DynamoDBS3Repository(BaseRepository):
         self.table_name = table_name
         self.bucket_name = bucket_name
         
+        # 연결 풀 + keep-alive로 호출마다 TLS 연결을 새로 맺지 않도록 함
+        config = Config(
+            max_pool_connections=settings.storage_max_pool_connections,
+            tcp_keepalive=True,
+            retries={'mode': 'adaptive', 'max_attempts': 5}
+        )
+        
         # DynamoDB 클라이언트
         self.dynamodb = boto3.resource(
             'dynamodb',
             region_name=settings.aws_region,
             aws_access_key_id=settings.aws_access_key_id or None,
-            aws_secret_access_key=settings.aws_secret_access_key or None
+            aws_secret_access_key=settings.aws_secret_access_key or None,
+            config=config
         )
         
         # S3 클라이언트
@@ -32,59 +68,19 @@ class DynamoDBS3Repository(BaseRepository):
             's3',
             region_name=settings.aws_region,
             aws_access_key_id=settings.aws_access_key_id or None,
-            aws_secret_access_key=settings.aws_secret_access_key or None
+            aws_secret_access_key=settings.aws_secret_access_key or None,
+            config=config
         )
         
         self.table = None
+        # update_job에서 정렬 키 확인용 query를 생략하기 위한 캐시 (create_job/get_job에서 채움)
+        self._created_at_cache: Dict[str, str] = {}
     
     async def initialize(self):
         """DynamoDB 테이블 및 S3 버킷 초기화"""
         try:
-            # DynamoDB 테이블 생성 (없으면)
-            try:
-                self.table = self.dynamodb.Table(self.table_name)
-                self.table.load()
-            except self.dynamodb.meta.client.exceptions.ResourceNotFoundException:
-                self.table = self.dynamodb.create_table(
-                    TableName=self.table_name,
-                    KeySchema=[
-                        {'AttributeName': 'job_id', 'KeyType': 'HASH'},
-                        {'AttributeName': 'created_at', 'KeyType': 'RANGE'}
-                    ],
-                    AttributeDefinitions=[
-                        {'AttributeName': 'job_id', 'AttributeType': 'S'},
-                        {'AttributeName': 'created_at', 'AttributeType': 'S'},
-                        {'AttributeName': 'prompt_type', 'AttributeType': 'S'},
-                        {'AttributeName': 'final_score', 'AttributeType': 'N'}
-                    ],
-                    GlobalSecondaryIndexes=[
-                        {
-                            'IndexName': 'prompt-type-score-index',
-                            'KeySchema': [
-                                {'AttributeName': 'prompt_type', 'KeyType': 'HASH'},
-                                {'AttributeName': 'final_score', 'KeyType': 'RANGE'}
-                            ],
-                            'Projection': {'ProjectionType': 'ALL'},
-                            'BillingMode': 'PAY_PER_REQUEST'
-                        },
-                        {
-                            'IndexName': 'created-at-index',
-                            'KeySchema': [
-                                {'AttributeName': 'created_at', 'KeyType': 'HASH'}
-                            ],
-                            'Projection': {'ProjectionType': 'ALL'},
-                            'BillingMode': 'PAY_PER_REQUEST'
-                        }
-                    ],
-                    BillingMode='PAY_PER_REQUEST'
-                )
-                self.table.wait_until_exists()
-            
-            # S3 버킷 생성 (없으면)
-            try:
-                self.s3_client.head_bucket(Bucket=self.bucket_name)
-            except:
-                self.s3_client.create_bucket(Bucket=self.bucket_name)
+            # 테이블/버킷 확인 및 생성은 블로킹 호출(대기 포함)이므로 스레드에서 실행
+            await asyncio.to_thread(self._ensure_resources)
             
             logger.info(f"DynamoDB + S3 repository initialized: {self.table_name}, {self.bucket_name}")
             
@@ -92,6 +88,67 @@ class DynamoDBS3Repository(BaseRepository):
             logger.error(f"Repository initialization failed: {str(e)}")
             raise StorageError(f"Failed to initialize repository: {str(e)}")
     
+    def _ensure_resources(self):
+        """DynamoDB 테이블 및 S3 버킷이 없으면 생성 (동기)"""
+        # DynamoDB 테이블 생성 (없으면)
+        try:
+            self.table = self.dynamodb.Table(self.table_name)
+            self.table.load()
+        except self.dynamodb.meta.client.exceptions.ResourceNotFoundException:
+            self.table = self.dynamodb.create_table(
+                TableName=self.table_name,
+                KeySchema=[
+                    {'AttributeName': 'job_id', 'KeyType': 'HASH'},
+                    {'AttributeName': 'created_at', 'KeyType': 'RANGE'}
+                ],
+                AttributeDefinitions=[
+                    {'AttributeName': 'job_id', 'AttributeType': 'S'},
+                    {'AttributeName': 'created_at', 'AttributeType': 'S'},
+                    {'AttributeName': 'prompt_type', 'AttributeType': 'S'},
+                    {'AttributeName': 'final_score', 'AttributeType': 'N'},
+                    {'AttributeName': 'entity_type', 'AttributeType': 'S'}
+                ],
+                GlobalSecondaryIndexes=[
+                    {
+                        'IndexName': 'prompt-type-score-index',
+                        'KeySchema': [
+                            {'AttributeName': 'prompt_type', 'KeyType': 'HASH'},
+                            {'AttributeName': 'final_score', 'KeyType': 'RANGE'}
+                        ],
+                        'Projection': {'ProjectionType': 'ALL'},
+                        'BillingMode': 'PAY_PER_REQUEST'
+                    },
+                    {
+                        'IndexName': 'created-at-index',
+                        'KeySchema': [
+                            {'AttributeName': 'created_at', 'KeyType': 'HASH'}
+                        ],
+                        'Projection': {'ProjectionType': 'ALL'},
+                        'BillingMode': 'PAY_PER_REQUEST'
+                    },
+                    {
+                        'IndexName': _JOB_LIST_INDEX,
+                        'KeySchema': [
+                            {'AttributeName': 'entity_type', 'KeyType': 'HASH'},
+                            {'AttributeName': 'created_at', 'KeyType': 'RANGE'}
+                        ],
+                        'Projection': {
+                            'ProjectionType': 'INCLUDE',
+                            'NonKeyAttributes': _JOB_LIST_ATTRIBUTES
+                        },
+                        'BillingMode': 'PAY_PER_REQUEST'
+                    }
+                ],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            self.table.wait_until_exists()
+        
+        # S3 버킷 생성 (없으면)
+        try:
+            self.s3_client.head_bucket(Bucket=self.bucket_name)
+        except:
+            self.s3_client.create_bucket(Bucket=self.bucket_name)
+    
     async def close(self):
         """리소스 정리"""
         pass
@@ -119,11 +176,13 @@ class DynamoDBS3Repository(BaseRepository):
             }
             
             input_s3_key = f"inputs/{job_id}.json"
-            self.s3_client.put_object(
+            await asyncio.to_thread(
+                self.s3_client.put_object,
                 Bucket=self.bucket_name,
                 Key=input_s3_key,
-                Body=json.dumps(input_data, ensure_ascii=False),
+                Body=gzip.compress(json_utils.dumps(input_data), compresslevel=6),
                 ContentType='application/json',
+                ContentEncoding='gzip',
                 Metadata={
                     'job-id': job_id,
                     'data-type': 'input',
@@ -134,6 +193,7 @@ class DynamoDBS3Repository(BaseRepository):
             # 2. DynamoDB에 메타데이터 저장
             item = {
                 'job_id': job_id,
+                'entity_type': _JOB_ENTITY,  # 목록 조회 GSI 파티션 키
                 'created_at': now,
                 'updated_at': now,
                 'status': JobStatus.PENDING.value,
@@ -145,7 +205,8 @@ class DynamoDBS3Repository(BaseRepository):
                 'has_outputs': False
             }
             
-            self.table.put_item(Item=item)
+            await asyncio.to_thread(self.table.put_item, Item=item)
+            self._remember_created_at(job_id, now)
             
             logger.info(f"Job created: {job_id} (Input stored in S3: {input_s3_key})")
             return job_id
@@ -158,7 +219,8 @@ class DynamoDBS3Repository(BaseRepository):
         """작업 조회 - DynamoDB에서 지표, S3에서 입력/출력"""
         try:
             # DynamoDB에서 메타데이터 조회
-            response = self.table.query(
+            response = await asyncio.to_thread(
+                self.table.query,
                 KeyConditionExpression='job_id = :job_id',
                 ExpressionAttributeValues={':job_id': job_id},
                 ScanIndexForward=False,  # 최신순
@@ -169,14 +231,17 @@ class DynamoDBS3Repository(BaseRepository):
                 return None
             
             item = response['Items'][0]
+            self._remember_created_at(job_id, item['created_at'])
             
-            # S3에서 입력 데이터 조회
-            input_data = await self._get_data_from_s3(item['s3_input_key'])
-            
-            # S3에서 출력 데이터 조회 (있으면)
-            output_data = None
+            # S3에서 입력/출력 데이터를 동시에 조회 (출력은 있을 때만)
             if item.get('has_outputs', False):
-                output_data = await self._get_data_from_s3(item['s3_output_key'])
+                input_data, output_data = await asyncio.gather(
+                    self._get_data_from_s3(item['s3_input_key']),
+                    self._get_data_from_s3(item['s3_output_key'])
+                )
+            else:
+                input_data = await self._get_data_from_s3(item['s3_input_key'])
+                output_data = None
             
             # JobResponse 생성
             return self._item_to_job_response(item, input_data, output_data)
@@ -188,22 +253,33 @@ class DynamoDBS3Repository(BaseRepository):
     async def update_job(self, job_id: str, updates: Dict[str, Any]) -> bool:
         """작업 업데이트 - DynamoDB 지표 업데이트, S3에 출력 저장"""
         try:
-            # 현재 아이템 조회
-            response = self.table.query(
-                KeyConditionExpression='job_id = :job_id',
-                ExpressionAttributeValues={':job_id': job_id},
-                ScanIndexForward=False,
-                Limit=1
-            )
-            
-            if not response['Items']:
-                return False
+            # 정렬 키(created_at)는 캐시에 없을 때만 query로 확인
+            created_at = self._created_at_cache.get(job_id)
+            if created_at is None:
+                response = await asyncio.to_thread(
+                    self.table.query,
+                    KeyConditionExpression=Key('job_id').eq(job_id),
+                    ScanIndexForward=False,
+                    Limit=1,
+                    ProjectionExpression='created_at'
+                )
+                
+                if not response['Items']:
+                    return False
+                
+                created_at = response['Items'][0]['created_at']
+                self._remember_created_at(job_id, created_at)
             
-            item = response['Items'][0]
+            # create_job에서 예약한 출력 키
+            s3_output_key = f"outputs/{job_id}.json"
             
             # 업데이트 표현식 구성
-            update_expression = "SET updated_at = :updated_at"
-            expression_values = {':updated_at': datetime.utcnow().isoformat()}
+            # entity_type도 함께 기록해 목록 GSI 도입 전에 생성된 작업이 업데이트 시 인덱스에 들어가도록
+            update_expression = "SET updated_at = :updated_at, entity_type = :entity_type"
+            expression_values = {
+                ':updated_at': datetime.utcnow().isoformat(),
+                ':entity_type': _JOB_ENTITY
+            }
             
             if 'status' in updates:
                 update_expression += ", #status = :status"
@@ -213,6 +289,10 @@ class DynamoDBS3Repository(BaseRepository):
                 update_expression += ", error_message = :error_message"
                 expression_values[':error_message'] = updates['error_message']
             
+            if 'execution_results' in updates and updates['execution_results']:
+                update_expression += ", has_outputs = :has_outputs"
+                expression_values[':has_outputs'] = True
+            
             # 평가 결과 저장
             if 'result' in updates and updates['result']:
                 result = updates['result']
@@ -223,68 +303,187 @@ class DynamoDBS3Repository(BaseRepository):
                 expression_values[':metrics'] = metrics
                 expression_values[':final_score'] = metrics['final_score']
             
-            # 실행 결과가 있으면 S3에 출력 저장
-            if 'execution_results' in updates and updates['execution_results']:
-                await self._save_outputs_to_s3(job_id, item['s3_output_key'], updates['execution_results'])
-                update_expression += ", has_outputs = :has_outputs"
-                expression_values[':has_outputs'] = True
+            update_kwargs = {
+                'Key': {
+                    'job_id': job_id,
+                    'created_at': created_at
+                },
+                'UpdateExpression': update_expression,
+                'ExpressionAttributeValues': expression_values,
+                # 캐시된 키의 아이템이 사라졌으면 새로 만들지 않고 실패하도록
+                'ConditionExpression': Attr('job_id').exists()
+            }
+            if 'status' in updates:
+                update_kwargs['ExpressionAttributeNames'] = {'#status': 'status'}
             
             # DynamoDB 업데이트
-            self.table.update_item(
-                Key={
-                    'job_id': item['job_id'],
-                    'created_at': item['created_at']
-                },
-                UpdateExpression=update_expression,
-                ExpressionAttributeValues=expression_values,
-                ExpressionAttributeNames={'#status': 'status'} if 'status' in updates else None
-            )
+            writes = [asyncio.to_thread(self.table.update_item, **update_kwargs)]
+            
+            # 실행 결과가 있으면 S3에 출력 저장 (DynamoDB 업데이트와 동시에 진행)
+            if 'execution_results' in updates and updates['execution_results']:
+                writes.append(self._save_outputs_to_s3(job_id, s3_output_key, updates['execution_results']))
             
+            await asyncio.gather(*writes)
             return True
             
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                self._created_at_cache.pop(job_id, None)
+                logger.warning(f"Job not found for update: {job_id}")
+                return False
+            logger.error(f"Job update failed: {str(e)}")
+            raise StorageError(f"Failed to update job: {str(e)}")
         except Exception as e:
             logger.error(f"Job update failed: {str(e)}")
             raise StorageError(f"Failed to update job: {str(e)}")
     
-    async def list_jobs(self, page: int = 1, size: int = 10) -> List[JobResponse]:
-        """작업 목록 조회 - DynamoDB 스캔 (지표만, 성능 최적화)"""
+    def _remember_created_at(self, job_id: str, created_at: str):
+        """job_id의 정렬 키 캐시 (가득 차면 가장 오래된 항목 제거)"""
+        self._created_at_cache[job_id] = created_at
+        if len(self._created_at_cache) > _SORT_KEY_CACHE_SIZE:
+            self._created_at_cache.pop(next(iter(self._created_at_cache)))
+    
+    async def list_jobs(self, page: int = 1, size: int = 10, request_id: Optional[str] = None) -> List[JobResponse]:
+        """작업 목록 조회 - 생성일시 GSI를 최신순으로 query (지표만, 성능 최적화)"""
         try:
-            # DynamoDB 스캔 (최신순)
-            response = self.table.scan(
-                Limit=size * 2,  # 여유분 확보
-                ProjectionExpression='job_id, created_at, updated_at, #status, prompt_type, final_score, metrics, s3_input_key',
-                ExpressionAttributeNames={'#status': 'status'}
-            )
-            
-            jobs = []
-            for item in response['Items']:
-                # 목록에서는 입력/출력 데이터 로드하지 않음 (성능 최적화)
-                job = self._item_to_job_response(item, None, None, summary_only=True)
-                jobs.append(job)
-            
-            # 생성일시 기준 정렬 후 페이징
-            jobs.sort(key=lambda x: x.created_at, reverse=True)
-            start_idx = (page - 1) * size
-            return jobs[start_idx:start_idx + size]
+            if request_id:
+                # 특정 작업만 조회 (기본 키 query)
+                response = await asyncio.to_thread(
+                    self.table.query,
+                    KeyConditionExpression=Key('job_id').eq(request_id),
+                    ScanIndexForward=False,
+                    Limit=1
+                )
+                items = response['Items'] if page == 1 else []
+            else:
+                try:
+                    items = await asyncio.to_thread(self._query_recent_jobs, page, size)
+                except ClientError as e:
+                    if e.response.get('Error', {}).get('Code') != 'ValidationException':
+                        raise
+                    # 목록 GSI가 없는 기존 테이블은 스캔으로 대체
+                    logger.warning(f"{_JOB_LIST_INDEX} not available, falling back to scan: {str(e)}")
+                    return await self._scan_jobs(page, size)
+            
+            # 목록에서는 입력/출력 데이터 로드하지 않음 (성능 최적화)
+            return [self._item_to_job_response(item, None, None, summary_only=True) for item in items]
             
         except Exception as e:
             logger.error(f"Job listing failed: {str(e)}")
             raise StorageError(f"Failed to list jobs: {str(e)}")
     
+    def _query_recent_jobs(self, page: int, size: int) -> List[Dict]:
+        """목록 GSI를 최신순으로 읽어 요청한 페이지의 아이템 반환 (앞 페이지까지만 읽음)"""
+        needed = page * size
+        items = []
+        query_kwargs = {
+            'IndexName': _JOB_LIST_INDEX,
+            'KeyConditionExpression': Key('entity_type').eq(_JOB_ENTITY),
+            'ScanIndexForward': False,  # 최신순
+            'Limit': needed
+        }
+        
+        while True:
+            response = self.table.query(**query_kwargs)
+            items.extend(response['Items'])
+            if len(items) >= needed or 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            query_kwargs['Limit'] = needed - len(items)
+        
+        return items[(page - 1) * size:needed]
+    
+    async def _scan_jobs(self, page: int, size: int) -> List[JobResponse]:
+        """목록 GSI가 없을 때의 스캔 기반 목록 조회"""
+        # DynamoDB 스캔 (최신순)
+        response = await asyncio.to_thread(
+            self.table.scan,
+            Limit=size * 2,  # 여유분 확보
+            ProjectionExpression='job_id, created_at, updated_at, #status, prompt_type, final_score, metrics, s3_input_key',
+            ExpressionAttributeNames={'#status': 'status'}
+        )
+        
+        jobs = []
+        for item in response['Items']:
+            # 목록에서는 입력/출력 데이터 로드하지 않음 (성능 최적화)
+            job = self._item_to_job_response(item, None, None, summary_only=True)
+            jobs.append(job)
+        
+        # 생성일시 기준 정렬 후 페이징
+        jobs.sort(key=lambda x: x.created_at, reverse=True)
+        start_idx = (page - 1) * size
+        return jobs[start_idx:start_idx + size]
+    
     async def count_jobs(self) -> int:
-        """전체 작업 수"""
+        """전체 작업 수 (list_jobs와 같은 목록 GSI 기준이라 total과 페이지가 일치)"""
         try:
-            response = self.table.scan(Select='COUNT')
-            return response['Count']
+            try:
+                return await asyncio.to_thread(
+                    self._count_items,
+                    self.table.query,
+                    IndexName=_JOB_LIST_INDEX,
+                    KeyConditionExpression=Key('entity_type').eq(_JOB_ENTITY)
+                )
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'ValidationException':
+                    raise
+                # 목록 GSI가 없는 기존 테이블은 스캔으로 대체
+                return await asyncio.to_thread(self._count_items, self.table.scan)
         except Exception as e:
             logger.error(f"Job counting failed: {str(e)}")
             return 0
     
+    @staticmethod
+    def _count_items(operation, **kwargs) -> int:
+        """query/scan의 Select='COUNT' 결과를 모든 페이지에 걸쳐 합산 (동기)"""
+        total = 0
+        while True:
+            response = operation(Select='COUNT', **kwargs)
+            total += response['Count']
+            if 'LastEvaluatedKey' not in response:
+                return total
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    async def backfill_job_list_index(self) -> int:
+        """
+        entity_type이 없는 기존 작업에 entity_type='JOB'을 채워 목록 GSI에 포함시킴 (1회성 마이그레이션)
+        - 기존 테이블에 jobs-by-created-at-index를 수동으로 추가한 뒤 한 번 실행
+        - 실행 전까지 그 이전에 생성된 작업은 list_jobs/count_jobs에 나타나지 않음
+        """
+        try:
+            updated = await asyncio.to_thread(self._backfill_entity_type)
+            logger.info(f"Backfilled entity_type on {updated} job(s)")
+            return updated
+        except Exception as e:
+            logger.error(f"Job list index backfill failed: {str(e)}")
+            raise StorageError(f"Failed to backfill job list index: {str(e)}")
+    
+    def _backfill_entity_type(self) -> int:
+        """entity_type 없는 작업 아이템을 스캔해 하나씩 업데이트 (동기)"""
+        updated = 0
+        scan_kwargs = {
+            'FilterExpression': Attr('job_id').exists() & Attr('entity_type').not_exists(),
+            'ProjectionExpression': 'job_id, created_at'
+        }
+        while True:
+            response = self.table.scan(**scan_kwargs)
+            for item in response['Items']:
+                self.table.update_item(
+                    Key={'job_id': item['job_id'], 'created_at': item['created_at']},
+                    UpdateExpression='SET entity_type = :entity_type',
+                    ExpressionAttributeValues={':entity_type': _JOB_ENTITY},
+                    ConditionExpression=Attr('job_id').exists()
+                )
+                updated += 1
+            if 'LastEvaluatedKey' not in response:
+                return updated
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
     async def _get_data_from_s3(self, s3_key: str) -> Optional[Dict]:
-        """S3에서 데이터 조회"""
+        """S3에서 데이터 조회 (블로킹 boto3 호출은 스레드에서 실행)"""
         try:
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
-            return json.loads(response['Body'].read().decode('utf-8'))
+            body = await asyncio.to_thread(self._read_s3_object, s3_key)
+            return json_utils.loads(body)
         except self.s3_client.exceptions.NoSuchKey:
             logger.warning(f"S3 key not found: {s3_key}")
             return None
@@ -292,6 +491,14 @@ class DynamoDBS3Repository(BaseRepository):
             logger.error(f"Failed to get data from S3 ({s3_key}): {str(e)}")
             return None
     
+    def _read_s3_object(self, s3_key: str) -> bytes:
+        """S3 객체 본문 읽기 (동기, gzip 저장본은 압축 해제 / 이전의 비압축 객체는 그대로)"""
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+        body = response['Body'].read()
+        if response.get('ContentEncoding') == 'gzip':
+            return gzip.decompress(body)
+        return body
+    
     async def _save_outputs_to_s3(self, job_id: str, s3_key: str, execution_results: Dict[str, Any]):
         """S3에 AI 출력 결과 저장"""
         try:
@@ -302,11 +509,13 @@ class DynamoDBS3Repository(BaseRepository):
                 'note': 'AI generated outputs - full execution results'
             }
             
-            self.s3_client.put_object(
+            await asyncio.to_thread(
+                self.s3_client.put_object,
                 Bucket=self.bucket_name,
                 Key=s3_key,
-                Body=json.dumps(output_data, ensure_ascii=False),
+                Body=gzip.compress(json_utils.dumps(output_data), compresslevel=6),
                 ContentType='application/json',
+                ContentEncoding='gzip',
                 Metadata={
                     'job-id': job_id,
                     'data-type': 'output',
@@ -395,7 +604,8 @@ class DynamoDBS3Repository(BaseRepository):
     async def get_job_inputs(self, job_id: str) -> Optional[Dict]:
         """작업의 입력 데이터만 S3에서 조회"""
         try:
-            response = self.table.query(
+            response = await asyncio.to_thread(
+                self.table.query,
                 KeyConditionExpression='job_id = :job_id',
                 ExpressionAttributeValues={':job_id': job_id},
                 ProjectionExpression='s3_input_key',
@@ -415,7 +625,8 @@ class DynamoDBS3Repository(BaseRepository):
     async def get_job_outputs(self, job_id: str) -> Optional[Dict]:
         """작업의 출력 데이터만 S3에서 조회"""
         try:
-            response = self.table.query(
+            response = await asyncio.to_thread(
+                self.table.query,
                 KeyConditionExpression='job_id = :job_id',
                 ExpressionAttributeValues={':job_id': job_id},
                 ProjectionExpression='s3_output_key, has_outputs',
@@ -457,24 +668,57 @@ class DynamoDBS3Repository(BaseRepository):
             # 1. S3에 examples.json 저장
             s3_examples_data = create_s3_examples_data(job)
             s3_key = f"prompts/{prompt_id}/examples.json"
+            examples_body = json_utils.dumps(s3_examples_data.model_dump(), indent=settings.pretty_json_uploads)
             
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=json.dumps(s3_examples_data.model_dump(), ensure_ascii=False, indent=2),
-                ContentType='application/json',
-                Metadata={
-                    'prompt-id': prompt_id,
-                    'prompt-type': job.prompt_type.value,
-                    'created_at': s3_examples_data.created_at
-                }
+            # 텍스트 타입이고 본문이 작으면 S3 업로드 생략
+            # (DynamoDB 레코드의 examples에 같은 입력-출력 쌍이 이미 들어 있으므로 레코드만으로 조회 가능)
+            inline_examples = (
+                job.prompt_type != PromptType.TYPE_B_IMAGE
+                and len(examples_body) < settings.inline_examples_max_bytes
             )
             
-            s3_url = f"s3://{self.bucket_name}/{s3_key}"
-            logger.info(f"S3 examples saved: {s3_url}")
-            
-            # 2. TYPE_B_IMAGE인 경우 이미지도 S3에 저장 (TODO: 실제 이미지 데이터 처리)
-            # 현재는 URL만 생성, 실제 이미지 업로드는 별도 처리 필요
+            # 2. TYPE_B_IMAGE인 경우 생성된 이미지 파일도 S3에 저장 (examples.json과 동시에 업로드)
+            image_uploads = self._collect_image_uploads(job) if job.prompt_type == PromptType.TYPE_B_IMAGE else []
+            
+            uploads = [self._upload_image(local_path, image_key) for local_path, image_key in image_uploads]
+            if not inline_examples:
+                uploads.insert(0, asyncio.to_thread(
+                    self.s3_client.put_object,
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    Body=examples_body,
+                    ContentLength=len(examples_body),
+                    ContentType='application/json',
+                    Metadata={
+                        'prompt-id': prompt_id,
+                        'prompt-type': job.prompt_type.value,
+                        'created_at': s3_examples_data.created_at
+                    }
+                ))
+            
+            upload_results = await asyncio.gather(*uploads, return_exceptions=True)
+            
+            if inline_examples:
+                s3_url = None
+                logger.info(f"Examples stored inline in DynamoDB record ({len(examples_body)} bytes, S3 upload skipped)")
+                image_results = upload_results
+            else:
+                examples_result, *image_results = upload_results
+                if isinstance(examples_result, BaseException):
+                    raise examples_result
+                
+                s3_url = f"s3://{self.bucket_name}/{s3_key}"
+                logger.info(f"S3 examples saved: {s3_url}")
+            
+            # 이미지 업로드 실패는 저장 전체를 실패시키지 않고 기록만 함
+            images_uploaded = 0
+            for (local_path, image_key), result in zip(image_uploads, image_results):
+                if isinstance(result, BaseException):
+                    logger.warning(f"Image upload failed ({local_path} -> {image_key}): {str(result)}")
+                else:
+                    images_uploaded += 1
+            if image_uploads:
+                logger.info(f"S3 images saved: {images_uploaded}/{len(image_uploads)}")
             
             # 3. DynamoDB에 새 스키마로 저장
             dynamodb_record = convert_job_to_dynamodb_record(
@@ -484,6 +728,9 @@ class DynamoDBS3Repository(BaseRepository):
                 user_id=user_id,
                 s3_bucket=self.bucket_name
             )
+            if inline_examples:
+                # S3에 올리지 않은 examples.json을 가리키지 않도록 함
+                dynamodb_record.examples_s3_url = None
             
             # DynamoDB에 저장 (새 테이블 또는 기존 테이블에 새 형식으로)
             item = dynamodb_record.model_dump(by_alias=True)
@@ -491,7 +738,7 @@ class DynamoDBS3Repository(BaseRepository):
             # Decimal 변환 (DynamoDB는 float 대신 Decimal 사용)
             item = self._convert_floats_to_decimal(item)
             
-            self.table.put_item(Item=item)
+            await asyncio.to_thread(self.table.put_item, Item=item)
             logger.info(f"DynamoDB record saved: PK={dynamodb_record.pk}")
             
             return {
@@ -499,19 +746,59 @@ class DynamoDBS3Repository(BaseRepository):
                 "prompt_id": prompt_id,
                 "s3_url": s3_url,
                 "dynamodb_pk": dynamodb_record.pk,
-                "dynamodb_sk": dynamodb_record.sk
+                "dynamodb_sk": dynamodb_record.sk,
+                "images_uploaded": images_uploaded
             }
             
         except Exception as e:
             logger.error(f"Failed to save completed job: {str(e)}")
             raise StorageError(f"Failed to save completed job: {str(e)}")
     
-    def _convert_floats_to_decimal(self, obj: Any) -> Any:
-        """float를 Decimal로 변환 (DynamoDB 호환)"""
+    @staticmethod
+    def _collect_image_uploads(job: 'JobResponse') -> List[Tuple[str, str]]:
+        """입력별 대표 이미지(첫 번째 출력의 첫 번째 파일)의 (로컬 경로, S3 키) 목록"""
+        executions = job.result.execution_results.get('executions', []) if job.result and job.result.execution_results else []
+        
+        uploads = []
+        for exec_data in executions:
+            outputs = exec_data.get('outputs', [])
+            if not outputs:
+                continue
+            match = _GENERATED_IMAGES_RE.match(outputs[0])
+            if not match:
+                continue
+            local_path = match.group(1).strip()
+            if os.path.isfile(local_path):
+                uploads.append((local_path, f"prompts/{job.request_id}/images/output_{exec_data.get('input_index')}.png"))
+        return uploads
+    
+    async def _upload_image(self, local_path: str, image_key: str):
+        """이미지 파일 업로드 (큰 파일은 멀티파트로 나눠 병렬 전송)"""
+        await asyncio.to_thread(
+            self.s3_client.upload_file,
+            local_path,
+            self.bucket_name,
+            image_key,
+            ExtraArgs={'ContentType': 'image/png'},
+            Config=_IMAGE_TRANSFER_CONFIG
+        )
+    
+    @classmethod
+    def _convert_floats_to_decimal(cls, obj: Any) -> Any:
+        """float를 Decimal로 변환 (DynamoDB 호환) - 문자열/정수 등 변환할 필요 없는 값은 재귀 호출 없이 유지"""
+        obj_type = type(obj)
+        if obj_type is dict:
+            return {
+                k: v if type(v) in _PASSTHROUGH_TYPES else cls._convert_floats_to_decimal(v)
+                for k, v in obj.items()
+            }
+        if obj_type is list:
+            return [v if type(v) in _PASSTHROUGH_TYPES else cls._convert_floats_to_decimal(v) for v in obj]
+        # Decimal(str(x))가 가장 빠르고 최단 표현을 그대로 보존 (numpy float 등 float 하위 타입 포함)
         if isinstance(obj, float):
             return Decimal(str(obj))
-        elif isinstance(obj, dict):
-            return {k: self._convert_floats_to_decimal(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_floats_to_decimal(item) for item in obj]
+        if isinstance(obj, dict):
+            return {k: cls._convert_floats_to_decimal(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [cls._convert_floats_to_decimal(item) for item in obj]
         return obj
\ No newline at end of file
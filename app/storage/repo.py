@@ -1,11 +1,27 @@
+import base64
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from app.core.schemas import JobResponse, JobStatus
 
+def encode_job_cursor(job: JobResponse) -> str:
+    """목록 다음 페이지 커서 생성 (마지막 작업의 created_at + id를 URL-safe base64로 인코딩)"""
+    raw = f"{job.created_at.isoformat()}|{job.request_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_job_cursor(cursor: str) -> Tuple[str, str]:
+    """커서를 (created_at, id)로 디코딩 (형식이 잘못되면 ValueError)"""
+    created_at, sep, job_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').partition('|')
+    if not sep or not created_at or not job_id:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return created_at, job_id
+
 class BaseRepository(ABC):
     """저장소 기본 인터페이스"""
     
+    # list_jobs의 cursor(키셋 페이지네이션) 지원 여부
+    supports_cursor: bool = False
+    
     @abstractmethod
     async def initialize(self):
         """저장소 초기화"""
@@ -33,7 +49,7 @@ class BaseRepository(ABC):
     
     @abstractmethod
     async def list_jobs(self, page: int = 1, size: int = 10, request_id: Optional[str] = None) -> List[JobResponse]:
-        """작업 목록 조회"""
+        """작업 목록 조회 (supports_cursor인 저장소는 cursor 키워드 인자도 받음)"""
         pass
     
     @abstractmethod
@@ -1,38 +1,51 @@
-import json
 import uuid
 import boto3
+import asyncio
 import logging
+from collections import OrderedDict
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from botocore.config import Config
 from app.storage.repo import BaseRepository
 from app.core.schemas import JobResponse, JobStatus, PromptType, ExampleInput, EvaluationResult
 from app.core.errors import StorageError
 from app.core.config import settings
+from app.core import json_utils
 
 logger = logging.getLogger(__name__)
 
+# 프로세스 내 메타데이터 캐시 최대 항목 수 (가장 오래 안 쓴 항목부터 제거)
+_METADATA_CACHE_SIZE = 10_000
+
 class S3Repository(BaseRepository):
     """S3 기반 저장소 - 프롬프트와 지표값만 저장"""
     
     def __init__(self, bucket_name: str = "prompt-eval-bucket"):
         self.bucket_name = bucket_name
+        # 연결 풀 + keep-alive로 호출마다 TLS 연결을 새로 맺지 않도록 함
         self.s3_client = boto3.client(
             's3',
             region_name=settings.aws_region,
             aws_access_key_id=settings.aws_access_key_id or None,
-            aws_secret_access_key=settings.aws_secret_access_key or None
+            aws_secret_access_key=settings.aws_secret_access_key or None,
+            config=Config(
+                max_pool_connections=settings.storage_max_pool_connections,
+                tcp_keepalive=True,
+                retries={'mode': 'adaptive', 'max_attempts': 5}
+            )
         )
-        # 메타데이터용 로컬 캐시 (실제로는 DynamoDB 사용 권장)
-        self.metadata_cache = {}
+        # 메타데이터용 로컬 LRU 캐시 (실제로는 DynamoDB 사용 권장)
+        # 디코딩된 dict 대신 S3에 올린/받은 JSON 바이트를 그대로 보관해 메모리 사용량을 줄임
+        self.metadata_cache: "OrderedDict[str, bytes]" = OrderedDict()
     
     async def initialize(self):
         """S3 버킷 초기화"""
         try:
             # 버킷 존재 확인, 없으면 생성
             try:
-                self.s3_client.head_bucket(Bucket=self.bucket_name)
+                await asyncio.to_thread(self.s3_client.head_bucket, Bucket=self.bucket_name)
             except:
-                self.s3_client.create_bucket(Bucket=self.bucket_name)
+                await asyncio.to_thread(self.s3_client.create_bucket, Bucket=self.bucket_name)
                 logger.info(f"S3 bucket created: {self.bucket_name}")
             
             logger.info(f"S3 repository initialized: {self.bucket_name}")
@@ -73,15 +86,17 @@ class S3Repository(BaseRepository):
             
             # S3에 메타데이터 저장
             s3_key = f"jobs/{job_id}/metadata.json"
-            self.s3_client.put_object(
+            body = json_utils.dumps(job_metadata)
+            await asyncio.to_thread(
+                self.s3_client.put_object,
                 Bucket=self.bucket_name,
                 Key=s3_key,
-                Body=json.dumps(job_metadata, ensure_ascii=False),
+                Body=body,
                 ContentType='application/json'
             )
             
             # 로컬 캐시에도 저장
-            self.metadata_cache[job_id] = job_metadata
+            self._cache_metadata(job_id, body)
             
             logger.info(f"Job created in S3: {job_id}")
             return job_id
@@ -93,18 +108,9 @@ class S3Repository(BaseRepository):
     async def get_job(self, job_id: str) -> Optional[JobResponse]:
         """작업 조회"""
         try:
-            # 로컬 캐시 먼저 확인
-            if job_id in self.metadata_cache:
-                job_data = self.metadata_cache[job_id]
-            else:
-                # S3에서 메타데이터 조회
-                s3_key = f"jobs/{job_id}/metadata.json"
-                try:
-                    response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
-                    job_data = json.loads(response['Body'].read().decode('utf-8'))
-                    self.metadata_cache[job_id] = job_data
-                except self.s3_client.exceptions.NoSuchKey:
-                    return None
+            job_data = await self._load_metadata(job_id)
+            if job_data is None:
+                return None
             
             # 지표 결과 조회 (있다면)
             result = None
@@ -120,13 +126,12 @@ class S3Repository(BaseRepository):
     async def update_job(self, job_id: str, updates: Dict[str, Any]) -> bool:
         """작업 업데이트"""
         try:
-            # 현재 데이터 조회
-            current_job = await self.get_job(job_id)
-            if not current_job:
+            # 현재 메타데이터만 조회 (지표 결과 조회/JobResponse 변환 없이 존재 여부 확인)
+            job_data = await self._load_metadata(job_id)
+            if job_data is None:
                 return False
             
             # 메타데이터 업데이트
-            job_data = self.metadata_cache.get(job_id, {})
             
             if 'status' in updates:
                 job_data['status'] = updates['status']
@@ -142,15 +147,17 @@ class S3Repository(BaseRepository):
             
             # S3에 메타데이터 업데이트
             s3_key = f"jobs/{job_id}/metadata.json"
-            self.s3_client.put_object(
+            body = json_utils.dumps(job_data)
+            await asyncio.to_thread(
+                self.s3_client.put_object,
                 Bucket=self.bucket_name,
                 Key=s3_key,
-                Body=json.dumps(job_data, ensure_ascii=False),
+                Body=body,
                 ContentType='application/json'
             )
             
             # 로컬 캐시 업데이트
-            self.metadata_cache[job_id] = job_data
+            self._cache_metadata(job_id, body)
             
             return True
             
@@ -161,25 +168,16 @@ class S3Repository(BaseRepository):
     async def list_jobs(self, page: int = 1, size: int = 10) -> List[JobResponse]:
         """작업 목록 조회 (간단 구현)"""
         try:
-            # S3에서 모든 job 메타데이터 조회
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix="jobs/",
-                Delimiter="/"
-            )
-            
-            jobs = []
-            job_folders = response.get('CommonPrefixes', [])
+            # S3에서 모든 job ID 조회 (1000개 이상이면 여러 페이지)
+            job_ids = await asyncio.to_thread(self._list_job_ids)
             
             # 페이징 처리
             start_idx = (page - 1) * size
             end_idx = start_idx + size
             
-            for folder in job_folders[start_idx:end_idx]:
-                job_id = folder['Prefix'].split('/')[1]
-                job = await self.get_job(job_id)
-                if job:
-                    jobs.append(job)
+            # 페이지 내 작업들은 동시에 조회
+            fetched = await asyncio.gather(*(self.get_job(job_id) for job_id in job_ids[start_idx:end_idx]))
+            jobs = [job for job in fetched if job]
             
             # 최신순 정렬
             jobs.sort(key=lambda x: x.created_at, reverse=True)
@@ -192,12 +190,7 @@ class S3Repository(BaseRepository):
     async def count_jobs(self) -> int:
         """전체 작업 수"""
         try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix="jobs/",
-                Delimiter="/"
-            )
-            return len(response.get('CommonPrefixes', []))
+            return len(await asyncio.to_thread(self._list_job_ids))
         except Exception as e:
             logger.error(f"Job counting failed: {str(e)}")
             return 0
@@ -220,10 +213,11 @@ class S3Repository(BaseRepository):
             
             # S3에 지표만 저장
             s3_key = f"jobs/{job_id}/evaluation_result.json"
-            self.s3_client.put_object(
+            await asyncio.to_thread(
+                self.s3_client.put_object,
                 Bucket=self.bucket_name,
                 Key=s3_key,
-                Body=json.dumps(metrics_only, ensure_ascii=False),
+                Body=json_utils.dumps(metrics_only),
                 ContentType='application/json'
             )
             
@@ -236,8 +230,7 @@ class S3Repository(BaseRepository):
         """S3에서 지표 결과 조회"""
         try:
             s3_key = f"jobs/{job_id}/evaluation_result.json"
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
-            metrics_data = json.loads(response['Body'].read().decode('utf-8'))
+            metrics_data = await asyncio.to_thread(self._read_json, s3_key)
             
             # EvaluationResult 객체로 변환
             return EvaluationResult(**metrics_data)
@@ -248,6 +241,53 @@ class S3Repository(BaseRepository):
             logger.error(f"Failed to get evaluation result: {str(e)}")
             return None
     
+    def _list_job_ids(self) -> List[str]:
+        """jobs/ 아래 모든 job ID 목록 (동기, 스레드에서 호출) - list_objects_v2 페이지를 끝까지 순회"""
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        return [
+            prefix['Prefix'].split('/')[1]
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix="jobs/", Delimiter="/")
+            for prefix in page.get('CommonPrefixes', [])
+        ]
+    
+    async def _load_metadata(self, job_id: str) -> Optional[Dict]:
+        """작업 메타데이터 조회 - 로컬 캐시 먼저 확인, 없으면 S3에서 한 번 읽음 (작업이 없으면 None)"""
+        job_data = self._cached_metadata(job_id)
+        if job_data is not None:
+            return job_data
+        
+        s3_key = f"jobs/{job_id}/metadata.json"
+        try:
+            body = await asyncio.to_thread(self._read_object, s3_key)
+        except self.s3_client.exceptions.NoSuchKey:
+            return None
+        self._cache_metadata(job_id, body)
+        return json_utils.loads(body)
+    
+    def _cache_metadata(self, job_id: str, body: bytes):
+        """메타데이터 JSON 바이트를 LRU 캐시에 저장"""
+        self.metadata_cache[job_id] = body
+        self.metadata_cache.move_to_end(job_id)
+        while len(self.metadata_cache) > _METADATA_CACHE_SIZE:
+            self.metadata_cache.popitem(last=False)
+    
+    def _cached_metadata(self, job_id: str) -> Optional[Dict]:
+        """캐시된 메타데이터를 필요할 때만 디코딩해서 반환 (없으면 None)"""
+        body = self.metadata_cache.get(job_id)
+        if body is None:
+            return None
+        self.metadata_cache.move_to_end(job_id)
+        return json_utils.loads(body)
+    
+    def _read_object(self, s3_key: str) -> bytes:
+        """S3 객체 본문 읽기 (동기, 스레드에서 호출)"""
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+        return response['Body'].read()
+    
+    def _read_json(self, s3_key: str) -> Dict:
+        """S3 JSON 객체 읽기 (동기, 스레드에서 호출)"""
+        return json_utils.loads(self._read_object(s3_key))
+    
     def _dict_to_job_response(self, job_data: Dict, result: Optional[EvaluationResult]) -> JobResponse:
         """딕셔너리를 JobResponse로 변환"""
         example_inputs = [
@@ -1,26 +1,65 @@
-import json
 import uuid
+import asyncio
 import aiosqlite
 import logging
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from app.storage.repo import BaseRepository
+from pydantic import TypeAdapter
+from app.storage.repo import BaseRepository, decode_job_cursor
 from app.core.schemas import JobResponse, JobStatus, PromptType, ExampleInput, EvaluationResult
 from app.core.errors import StorageError
+from app.core import json_utils
 
 logger = logging.getLogger(__name__)
 
+# 연결 시 적용하는 PRAGMA
+# - WAL: 읽기가 쓰기를 막지 않고, 커밋마다 fsync하지 않음 (synchronous=NORMAL과 함께 사용)
+# - busy_timeout: 동시 요청 시 "database is locked" 대신 최대 5초 대기
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # 약 64MB
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA mmap_size=268435456",  # 256MB
+)
+
+# example_inputs 컬럼 직렬화/검증용 (스키마는 한 번만 생성)
+_EXAMPLE_INPUTS_ADAPTER = TypeAdapter(List[ExampleInput])
+
+# 조회 시 읽는 컬럼 (SELECT * 대신 명시, _row_to_job_response에서 이름으로 접근)
+_JOB_COLUMNS = (
+    "id, status, prompt, prompt_type, example_inputs, recommended_model, repeat_count, "
+    "result, error_message, created_at, updated_at"
+)
+
+_INSERT_JOB_SQL = """
+    INSERT INTO jobs (
+        id, status, prompt, prompt_type, example_inputs,
+        recommended_model, repeat_count, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 class SQLiteRepository(BaseRepository):
     """SQLite 기반 저장소"""
     
+    supports_cursor = True
+    
     def __init__(self, db_path: str = "prompt_eval.db"):
         self.db_path = db_path
         self.db = None
+        # save_completed_job용 (S3 클라이언트, DynamoDB 테이블) - 처음 사용할 때 한 번만 생성
+        self._aws_clients = None
+        self._aws_lock = asyncio.Lock()
     
     async def initialize(self):
         """데이터베이스 초기화"""
         try:
             self.db = await aiosqlite.connect(self.db_path)
+            self.db.row_factory = aiosqlite.Row
+            for pragma in _CONNECTION_PRAGMAS:
+                await self.db.execute(pragma)
+            await self.db.commit()
             await self._create_tables()
             logger.info(f"SQLite database initialized: {self.db_path}")
         except Exception as e:
@@ -49,32 +88,22 @@ class SQLiteRepository(BaseRepository):
                 updated_at TEXT NOT NULL
             )
         """)
+        # 목록 조회(최신순 페이지)와 상태별 조회가 전체 스캔 + 정렬 없이 인덱스를 역순으로 읽도록 함
+        # (created_at, id) 순서는 키셋 페이지네이션 커서와 같은 정렬 (같은 시각에 생성된 작업도 순서 고정)
+        await self.db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created_at_id ON jobs(created_at DESC, id DESC)")
+        await self.db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at DESC)")
+        # 통계가 오래됐거나 없으면 갱신 (필요할 때만 ANALYZE 수행)
+        await self.db.execute("PRAGMA optimize")
         await self.db.commit()
     
     async def create_job(self, job_data: Dict[str, Any]) -> str:
         """작업 생성"""
         try:
-            job_id = str(uuid.uuid4())
-            now = datetime.utcnow().isoformat()
-            
-            await self.db.execute("""
-                INSERT INTO jobs (
-                    id, status, prompt, prompt_type, example_inputs,
-                    recommended_model, repeat_count, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                job_id,
-                JobStatus.PENDING.value,
-                job_data['prompt'],
-                job_data['prompt_type'],
-                json.dumps([inp.model_dump() if hasattr(inp, 'model_dump') else inp for inp in job_data['example_inputs']]),
-                job_data.get('recommended_model'),
-                job_data['repeat_count'],
-                now,
-                now
-            ))
+            row = self._job_row(job_data, datetime.utcnow().isoformat())
+            await self.db.execute(_INSERT_JOB_SQL, row)
             await self.db.commit()
             
+            job_id = row[0]
             logger.info(f"Job created: {job_id}")
             return job_id
             
@@ -82,11 +111,45 @@ class SQLiteRepository(BaseRepository):
             logger.error(f"Job creation failed: {str(e)}")
             raise StorageError(f"Failed to create job: {str(e)}")
     
+    async def create_jobs(self, jobs: List[Dict[str, Any]]) -> List[str]:
+        """작업 일괄 생성 - 한 트랜잭션에서 insert 후 커밋 한 번 (행마다 커밋하지 않음)"""
+        try:
+            now = datetime.utcnow().isoformat()
+            rows = [self._job_row(job_data, now) for job_data in jobs]
+            await self.db.executemany(_INSERT_JOB_SQL, rows)
+            await self.db.commit()
+            
+            logger.info(f"Jobs created: {len(rows)}")
+            return [row[0] for row in rows]
+            
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Bulk job creation failed: {str(e)}")
+            raise StorageError(f"Failed to create jobs: {str(e)}")
+    
+    @staticmethod
+    def _job_row(job_data: Dict[str, Any], now: str) -> tuple:
+        """_INSERT_JOB_SQL 파라미터 (새 job ID 포함)"""
+        return (
+            str(uuid.uuid4()),
+            JobStatus.PENDING.value,
+            job_data['prompt'],
+            job_data['prompt_type'],
+            # 모델/dict가 섞여 있어도 검증 후 pydantic 직렬화기로 한 번에 JSON 생성
+            _EXAMPLE_INPUTS_ADAPTER.dump_json(
+                _EXAMPLE_INPUTS_ADAPTER.validate_python(job_data['example_inputs'])
+            ).decode('utf-8'),
+            job_data.get('recommended_model'),
+            job_data['repeat_count'],
+            now,
+            now
+        )
+    
     async def get_job(self, job_id: str) -> Optional[JobResponse]:
         """작업 조회"""
         try:
             cursor = await self.db.execute(
-                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+                f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
             )
             row = await cursor.fetchone()
             
@@ -108,7 +171,7 @@ class SQLiteRepository(BaseRepository):
             for key, value in updates.items():
                 if key == 'result' and value:
                     set_clauses.append("result = ?")
-                    values.append(json.dumps(value.model_dump()))
+                    values.append(value.model_dump_json())
                 elif key == 'status':
                     set_clauses.append("status = ?")
                     # JobStatus enum인 경우 .value로 변환
@@ -134,23 +197,37 @@ class SQLiteRepository(BaseRepository):
             logger.error(f"Job update failed: {str(e)}")
             raise StorageError(f"Failed to update job: {str(e)}")
     
-    async def list_jobs(self, page: int = 1, size: int = 10, request_id: Optional[str] = None) -> List[JobResponse]:
-        """작업 목록 조회"""
+    async def list_jobs(
+        self,
+        page: int = 1,
+        size: int = 10,
+        request_id: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> List[JobResponse]:
+        """
+        작업 목록 조회
+        - cursor(이전 페이지 마지막 작업의 커서)가 있으면 page 대신 키셋 방식으로 다음 페이지 조회
+          (OFFSET처럼 앞 페이지 행을 읽고 버리지 않으므로 페이지 번호와 관계없이 일정한 비용)
+        """
         try:
-            offset = (page - 1) * size
-            
             if request_id:
-                cursor = await self.db.execute(
-                    "SELECT * FROM jobs WHERE id = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                    (request_id, size, offset)
+                db_cursor = await self.db.execute(
+                    f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                    (request_id, size, (page - 1) * size)
+                )
+            elif cursor:
+                created_at, job_id = decode_job_cursor(cursor)
+                db_cursor = await self.db.execute(
+                    f"SELECT {_JOB_COLUMNS} FROM jobs WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?",
+                    (created_at, job_id, size)
                 )
             else:
-                cursor = await self.db.execute(
-                    "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                    (size, offset)
+                db_cursor = await self.db.execute(
+                    f"SELECT {_JOB_COLUMNS} FROM jobs ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                    (size, (page - 1) * size)
                 )
             
-            rows = await cursor.fetchall()
+            rows = await db_cursor.fetchall()
             
             return [self._row_to_job_response(row) for row in rows]
             
@@ -175,32 +252,60 @@ class SQLiteRepository(BaseRepository):
     
     def _row_to_job_response(self, row) -> JobResponse:
         """데이터베이스 행을 JobResponse로 변환"""
-        example_inputs_data = json.loads(row[4])
-        example_inputs = [ExampleInput(**inp) for inp in example_inputs_data]
+        # JSON 파싱과 모델 생성을 pydantic 검증기에서 한 번에 처리
+        example_inputs = _EXAMPLE_INPUTS_ADAPTER.validate_json(row["example_inputs"])
         
         result = None
-        if row[7]:  # result column
-            result_data = json.loads(row[7])
-            result = EvaluationResult(**result_data)
+        if row["result"]:
+            result = EvaluationResult.model_validate_json(row["result"])
         
         return JobResponse(
-            request_id=row[0],
-            status=JobStatus(row[1]),
-            prompt=row[2],
-            prompt_type=PromptType(row[3]),
+            request_id=row["id"],
+            status=JobStatus(row["status"]),
+            prompt=row["prompt"],
+            prompt_type=PromptType(row["prompt_type"]),
             example_inputs=example_inputs,
-            recommended_model=row[5],
-            repeat_count=row[6],
+            recommended_model=row["recommended_model"],
+            repeat_count=row["repeat_count"],
             result=result,
-            error_message=row[8],
-            created_at=datetime.fromisoformat(row[9]),
-            updated_at=datetime.fromisoformat(row[10])
+            error_message=row["error_message"],
+            created_at=datetime.fromisoformat(row["created_at"]),
+            updated_at=datetime.fromisoformat(row["updated_at"])
         )
     
     # ============================================
     # 새 스키마용 저장 메서드 (로컬 테스트용)
     # ============================================
     
+    @staticmethod
+    def _create_aws_clients():
+        """S3 클라이언트 / DynamoDB 테이블 생성 (연결 풀 + keep-alive)"""
+        import boto3
+        from botocore.config import Config
+        from app.core.config import settings
+
+        config = Config(
+            max_pool_connections=settings.storage_max_pool_connections,
+            tcp_keepalive=True,
+            retries={'mode': 'adaptive', 'max_attempts': 5}
+        )
+        credentials = dict(
+            region_name=settings.aws_region,
+            aws_access_key_id=settings.aws_access_key_id,
+            aws_secret_access_key=settings.aws_secret_access_key,
+            config=config
+        )
+        s3_client = boto3.client('s3', **credentials)
+        table = boto3.resource('dynamodb', **credentials).Table(settings.table_name)
+        return s3_client, table
+
+    async def _get_aws_clients(self):
+        """캐시된 (S3 클라이언트, DynamoDB 테이블) 반환 - 동시 저장 시 중복 생성 방지"""
+        async with self._aws_lock:
+            if self._aws_clients is None:
+                self._aws_clients = await asyncio.to_thread(self._create_aws_clients)
+        return self._aws_clients
+
     async def save_completed_job(
         self,
         job: 'JobResponse',
@@ -212,20 +317,10 @@ class SQLiteRepository(BaseRepository):
         완료된 Job을 S3 + DynamoDB에 저장
         """
         import os
-        import boto3
-        from decimal import Decimal
+        from pathlib import Path
         from app.core.schemas import convert_job_to_dynamodb_record, create_s3_examples_data
         from app.core.config import settings
-        
-        def convert_floats(obj):
-            """float를 Decimal로 변환"""
-            if isinstance(obj, float):
-                return Decimal(str(obj))
-            elif isinstance(obj, dict):
-                return {k: convert_floats(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_floats(item) for item in obj]
-            return obj
+        from app.storage.dynamodb_s3_repo import DynamoDBS3Repository
         
         try:
             prompt_id = job.request_id
@@ -234,11 +329,20 @@ class SQLiteRepository(BaseRepository):
             output_dir = f"outputs/{prompt_id}"
             os.makedirs(output_dir, exist_ok=True)
             
-            # examples.json 생성
-            s3_examples_data = create_s3_examples_data(job)
-            examples_path = f"{output_dir}/examples.json"
-            with open(examples_path, 'w', encoding='utf-8') as f:
-                json.dump(s3_examples_data.model_dump(), f, ensure_ascii=False, indent=2)
+            # examples.json 생성 (dict 변환/직렬화는 한 번만 하고 로컬 백업과 S3 업로드에 재사용)
+            examples_data = create_s3_examples_data(job).model_dump()
+            local_examples_body = json_utils.dumps(examples_data, indent=True)
+            Path(f"{output_dir}/examples.json").write_bytes(local_examples_body)
+            
+            # S3 본문은 설정에 따름 (들여쓰기 형식이면 로컬 백업을 그대로 재사용)
+            examples_body = (
+                local_examples_body if settings.pretty_json_uploads else json_utils.dumps(examples_data)
+            )
+            # DynamoDB 저장소와 같은 기준으로 작은 텍스트 examples.json은 S3 업로드 생략 (기본 0 = 항상 업로드)
+            inline_examples = (
+                job.prompt_type != PromptType.TYPE_B_IMAGE
+                and len(examples_body) < settings.inline_examples_max_bytes
+            )
             
             # DynamoDB 형식 레코드 생성
             dynamodb_record = convert_job_to_dynamodb_record(
@@ -248,55 +352,49 @@ class SQLiteRepository(BaseRepository):
                 user_id=user_id,
                 s3_bucket=settings.s3_bucket_name
             )
+            if inline_examples:
+                # S3에 올리지 않은 examples.json을 가리키지 않도록 함
+                dynamodb_record.examples_s3_url = None
             
-            record_path = f"{output_dir}/dynamodb_record.json"
-            with open(record_path, 'w', encoding='utf-8') as f:
-                json.dump(dynamodb_record.model_dump(by_alias=True), f, ensure_ascii=False, indent=2)
+            record_item = dynamodb_record.model_dump(by_alias=True)
+            Path(f"{output_dir}/dynamodb_record.json").write_bytes(json_utils.dumps(record_item, indent=True))
             
             logger.info(f"Local backup saved: {output_dir}")
             
             s3_url = None
             dynamodb_pk = None
             
-            # AWS 클라이언트 생성
             if settings.aws_access_key_id:
                 # 2. S3에 업로드
-                try:
-                    s3_client = boto3.client(
-                        's3',
-                        region_name=settings.aws_region,
-                        aws_access_key_id=settings.aws_access_key_id,
-                        aws_secret_access_key=settings.aws_secret_access_key
-                    )
-                    
-                    s3_key = f"prompts/{prompt_id}/examples.json"
-                    s3_client.put_object(
-                        Bucket=settings.s3_bucket_name,
-                        Key=s3_key,
-                        Body=json.dumps(s3_examples_data.model_dump(), ensure_ascii=False, indent=2),
-                        ContentType='application/json'
-                    )
-                    
-                    s3_url = f"s3://{settings.s3_bucket_name}/{s3_key}"
-                    logger.info(f"S3 upload success: {s3_url}")
-                    
-                except Exception as s3_error:
-                    logger.warning(f"S3 upload failed: {str(s3_error)}")
+                if inline_examples:
+                    logger.info(f"Examples stored inline in DynamoDB record ({len(examples_body)} bytes, S3 upload skipped)")
+                else:
+                    try:
+                        s3_client, _ = await self._get_aws_clients()
+                        
+                        s3_key = f"prompts/{prompt_id}/examples.json"
+                        await asyncio.to_thread(
+                            s3_client.put_object,
+                            Bucket=settings.s3_bucket_name,
+                            Key=s3_key,
+                            Body=examples_body,
+                            ContentLength=len(examples_body),
+                            ContentType='application/json'
+                        )
+                        
+                        s3_url = f"s3://{settings.s3_bucket_name}/{s3_key}"
+                        logger.info(f"S3 upload success: {s3_url}")
+                        
+                    except Exception as s3_error:
+                        logger.warning(f"S3 upload failed: {str(s3_error)}")
                 
                 # 3. DynamoDB에 저장
                 try:
-                    dynamodb = boto3.resource(
-                        'dynamodb',
-                        region_name=settings.aws_region,
-                        aws_access_key_id=settings.aws_access_key_id,
-                        aws_secret_access_key=settings.aws_secret_access_key
-                    )
-                    
-                    table = dynamodb.Table(settings.table_name)
-                    item = dynamodb_record.model_dump(by_alias=True)
-                    item = convert_floats(item)
+                    _, table = await self._get_aws_clients()
+                    # float -> Decimal 변환은 DynamoDB 저장소와 같은 변환기 사용 (로컬 백업용 dict 재사용)
+                    item = DynamoDBS3Repository._convert_floats_to_decimal(record_item)
                     
-                    table.put_item(Item=item)
+                    await asyncio.to_thread(table.put_item, Item=item)
                     dynamodb_pk = dynamodb_record.pk
                     logger.info(f"DynamoDB save success: PK={dynamodb_pk}")
                     
@@ -1,6 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
-from app.main import app
+from app.main import app, context
+from app.storage.sqlite_repo import SQLiteRepository
 
 client = TestClient(app)
 
@@ -36,4 +37,55 @@ def test_list_jobs():
     assert response.status_code == 200
     data = response.json()
     assert "jobs" in data
-    assert "total" in data
\ No newline at end of file
+    assert "total" in data
+
+@pytest.fixture
+def sqlite_client(tmp_path, monkeypatch):
+    """임시 SQLite 저장소에 작업 7개를 넣어 둔 클라이언트"""
+    storage = SQLiteRepository(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(context, "storage", storage)
+    monkeypatch.setattr(context, "cache", None)
+    with TestClient(app) as test_client:
+        test_client.portal.call(storage.create_jobs, [
+            {
+                "prompt": f"프롬프트 {i}: {{{{}}}}",
+                "prompt_type": "type_a",
+                "example_inputs": [{"content": "광속은?", "input_type": "text"}],
+                "repeat_count": 3
+            }
+            for i in range(7)
+        ])
+        yield test_client
+
+def test_list_jobs_cursor_matches_offset(sqlite_client):
+    """cursor로 넘긴 페이지가 page 방식과 같은 순서인지 확인"""
+    offset_ids = [
+        job["request_id"]
+        for page in (1, 2, 3)
+        for job in sqlite_client.get("/api/v1/jobs", params={"page": page, "size": 3}).json()["jobs"]
+    ]
+
+    cursor_ids = []
+    params = {"size": 3}
+    while True:
+        data = sqlite_client.get("/api/v1/jobs", params=params).json()
+        cursor_ids.extend(job["request_id"] for job in data["jobs"])
+        if not data["next_cursor"]:
+            break
+        assert data["page"] == (None if "cursor" in params else 1)
+        params = {"size": 3, "cursor": data["next_cursor"]}
+
+    assert len(offset_ids) == 7
+    assert cursor_ids == offset_ids
+
+def test_list_jobs_short_page_has_no_cursor(sqlite_client):
+    """마지막(가득 차지 않은) 페이지에는 next_cursor가 없음"""
+    data = sqlite_client.get("/api/v1/jobs", params={"size": 10}).json()
+    assert len(data["jobs"]) == 7
+    assert data["next_cursor"] is None
+
+def test_list_jobs_invalid_cursor(sqlite_client):
+    """잘못된 cursor는 500이 아닌 400"""
+    for cursor in ("!!bad", "bm8tc2VwYXJhdG9y", "//79"):
+        response = sqlite_client.get("/api/v1/jobs", params={"cursor": cursor})
+        assert response.status_code == 400
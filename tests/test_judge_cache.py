@@ -0,0 +1,59 @@
+import asyncio
+from app.cache.judge_cache import JudgeCache, cached_evaluate
+
+class FakeJudge:
+    """호출 횟수를 세는 Judge (judge_model이 있어야 캐시 대상)"""
+
+    def __init__(self, response: str, judge_model: str = "judge-model"):
+        self.response = response
+        self.judge_model = judge_model
+        self.calls = 0
+
+    async def evaluate(self, prompt: str, task_type: str) -> str:
+        self.calls += 1
+        return self.response
+
+def test_make_key_depends_on_model_prompt_and_task():
+    """같은 입력은 같은 키, 모델/프롬프트/작업 종류가 다르면 다른 키"""
+    key = JudgeCache.make_key("judge-model", "프롬프트", "accuracy")
+    assert key == JudgeCache.make_key("judge-model", "프롬프트", "accuracy")
+    assert key != JudgeCache.make_key("other-model", "프롬프트", "accuracy")
+    assert key != JudgeCache.make_key("judge-model", "다른 프롬프트", "accuracy")
+    assert key != JudgeCache.make_key("judge-model", "프롬프트", "relevance")
+
+def test_expired_entries_are_ignored_and_cleaned(tmp_path):
+    """TTL이 지난 항목은 조회되지 않고 cleanup_expired로 삭제"""
+    cache = JudgeCache(str(tmp_path / "data" / "judge_cache.db"))
+
+    async def run():
+        await cache.set("fresh", "accuracy", "85")
+        await cache.set("stale", "accuracy", "40", ttl=-1)
+        assert await cache.get("fresh") == "85"
+        assert await cache.get("stale") is None
+        assert await cache.cleanup_expired() == 1
+        assert await cache.cleanup_expired() == 0
+
+    asyncio.run(run())
+
+def test_cached_evaluate_reuses_only_successful_responses(tmp_path):
+    """정상 응답은 재사용하고 실패 응답/모델 ID 없는 Judge는 캐시하지 않음"""
+    cache = JudgeCache(str(tmp_path / "judge_cache.db"))
+
+    async def run():
+        judge = FakeJudge("90")
+        assert await cached_evaluate(judge, "p", "accuracy", cache) == "90"
+        assert await cached_evaluate(judge, "p", "accuracy", cache) == "90"
+        assert judge.calls == 1
+
+        failing = FakeJudge("평가 실패: timeout", judge_model="failing-model")
+        await cached_evaluate(failing, "p", "accuracy", cache)
+        await cached_evaluate(failing, "p", "accuracy", cache)
+        assert failing.calls == 2
+
+        mock = FakeJudge("70")
+        del mock.judge_model
+        await cached_evaluate(mock, "p", "accuracy", cache)
+        await cached_evaluate(mock, "p", "accuracy", cache)
+        assert mock.calls == 2
+
+    asyncio.run(run())
@@ -0,0 +1,23 @@
+from app.orchestrator.stages._prompt_util import PromptTemplate, fill_prompt
+
+def test_fill_prompt_input_placeholders():
+    """{{}} / {{input}} 플레이스홀더 치환 테스트"""
+    assert fill_prompt("질문: {{}}", "파리의 인구는?") == "질문: 파리의 인구는?"
+    assert fill_prompt("질문: {{input}}", "지구의 나이는?") == "질문: 지구의 나이는?"
+
+def test_fill_prompt_json_keys():
+    """JSON 입력의 키별 치환 테스트 (프롬프트의 다른 중괄호는 유지)"""
+    prompt = '{{name}}의 {{topic}}을 {"answer": "..."} 형식으로 설명하세요'
+    result = fill_prompt(prompt, '{"name": "서울", "topic": "역사"}')
+    assert result == '서울의 역사을 {"answer": "..."} 형식으로 설명하세요'
+
+def test_fill_prompt_without_placeholder():
+    """플레이스홀더가 없으면 입력을 맨 뒤에 추가"""
+    assert fill_prompt("다음 질문에 답하세요", "광속은?") == "다음 질문에 답하세요\n\n광속은?"
+    assert fill_prompt("{ 중괄호 }", "광속은?") == "{ 중괄호 }\n\n광속은?"
+
+def test_prompt_template_reused_across_inputs():
+    """한 번 분석한 템플릿을 여러 입력(일반 텍스트/JSON)에 재사용"""
+    template = PromptTemplate("{{input}} / {{topic}}")
+    assert template.fill("첫 번째") == "첫 번째 / {{topic}}"
+    assert template.fill('{"topic": "역사"}') == '{"topic": "역사"} / 역사'
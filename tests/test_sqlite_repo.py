@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from app.core.errors import StorageError
+from app.core.schemas import EvaluationResult, ExampleInput, JobStatus, MetricScore, PromptType
+from app.storage.sqlite_repo import SQLiteRepository
+
+def _job_data(i: int) -> dict:
+    return {
+        "prompt": f"프롬프트 {i}: {{{{}}}}",
+        "prompt_type": "type_a",
+        # 모델과 dict가 섞인 입력도 같은 JSON 컬럼으로 저장
+        "example_inputs": [
+            ExampleInput(content=f"질문 {i}"),
+            {"content": "https://example.com/a.png", "input_type": "image"}
+        ],
+        "recommended_model": None,
+        "repeat_count": 3
+    }
+
+def test_create_jobs_round_trip(tmp_path):
+    """create_jobs로 넣은 작업을 get_job/list_jobs로 그대로 읽을 수 있는지 확인"""
+    async def run():
+        repo = SQLiteRepository(str(tmp_path / "jobs.db"))
+        await repo.initialize()
+        try:
+            job_ids = await repo.create_jobs([_job_data(i) for i in range(5)])
+            assert len(set(job_ids)) == 5
+            assert await repo.count_jobs() == 5
+
+            job = await repo.get_job(job_ids[2])
+            assert job.request_id == job_ids[2]
+            assert job.status == JobStatus.PENDING
+            assert job.prompt == "프롬프트 2: {{}}"
+            assert job.prompt_type == PromptType.TYPE_A
+            assert job.example_inputs == [
+                ExampleInput(content="질문 2"),
+                ExampleInput(content="https://example.com/a.png", input_type="image")
+            ]
+            assert job.result is None
+
+            # 결과 JSON 컬럼도 pydantic 직렬화/검증으로 왕복
+            result = EvaluationResult(relevance=MetricScore(score=87.5, details={"per_input": [90, 85]}))
+            await repo.update_job(job_ids[2], {"status": JobStatus.COMPLETED, "result": result})
+            job = await repo.get_job(job_ids[2])
+            assert job.status == JobStatus.COMPLETED
+            assert job.result == result
+
+            listed = await repo.list_jobs(page=1, size=10)
+            assert sorted(j.request_id for j in listed) == sorted(job_ids)
+
+            # 잘못된 항목이 있으면 전체 롤백
+            with pytest.raises(StorageError):
+                await repo.create_jobs([_job_data(5), {"prompt": "필드 누락"}])
+            assert await repo.count_jobs() == 5
+        finally:
+            await repo.close()
+
+    asyncio.run(run())